@@ -0,0 +1,56 @@
+"""Read Fortran sources directly from release tarballs and zip archives"""
+
+import pathlib
+from typing import Iterator, Tuple
+
+from castep_linter.fortran.parser import is_fortran_file
+
+TAR_SUFFIXES = (".tar", ".tar.gz", ".tgz", ".tar.xz", ".txz", ".tar.bz2", ".tbz2")
+ZIP_SUFFIXES = (".zip",)
+
+
+def is_archive(file: pathlib.Path) -> bool:
+    """Check whether a file is an archive we know how to read"""
+    name = file.name.lower()
+    return name.endswith(TAR_SUFFIXES + ZIP_SUFFIXES)
+
+
+def iter_fortran_members(file: pathlib.Path) -> Iterator[Tuple[str, bytes]]:
+    """Yield the member path and contents of every Fortran file in an archive"""
+    if file.name.lower().endswith(ZIP_SUFFIXES):
+        yield from _iter_zip(file)
+    else:
+        yield from _iter_tar(file)
+
+
+def iter_named_members(file: pathlib.Path) -> Iterator[Tuple[str, bytes]]:
+    """Yield every Fortran file in an archive named by the archive and member path, eg
+    castep.tar.gz/src/a.f90, so that it cannot clash with files on disk or in other archives"""
+    for name, raw_text in iter_fortran_members(file):
+        yield f"{file}/{name}", raw_text
+
+
+def _iter_tar(file: pathlib.Path) -> Iterator[Tuple[str, bytes]]:
+    """Stream members from a (possibly compressed) tarball without seeking"""
+    import tarfile
+
+    with tarfile.open(file, mode="r|*") as tar:
+        for member in tar:
+            if not member.isfile() or not is_fortran_file(member.name):
+                continue
+            fd = tar.extractfile(member)
+            if fd is None:
+                continue
+            yield member.name, fd.read()
+
+
+def _iter_zip(file: pathlib.Path) -> Iterator[Tuple[str, bytes]]:
+    """Read members from a zip archive"""
+    import zipfile
+
+    with zipfile.ZipFile(file) as zf:
+        for info in zf.infolist():
+            if info.is_dir() or not is_fortran_file(info.filename):
+                continue
+            with zf.open(info) as fd:
+                yield info.filename, fd.read()
@@ -0,0 +1,85 @@
+"""Scan the most valuable files first and stop before running out of time"""
+
+import collections
+import logging
+import pathlib
+import queue
+import time
+from typing import TYPE_CHECKING, Callable, Collection, Iterator, List, Optional, Sequence, TypeVar
+
+from castep_linter import git_history
+
+if TYPE_CHECKING:
+    from multiprocessing.pool import Pool
+
+Task = TypeVar("Task")
+Result = TypeVar("Result")
+
+
+def prioritise(
+    files: Sequence[pathlib.Path],
+    had_errors: Collection[str],
+    repo: Optional[pathlib.Path] = None,
+) -> List[pathlib.Path]:
+    """Order files by how recently they were changed in git, then whether they
+    had errors in a previous scan, then their original order"""
+    try:
+        modified = git_history.last_modified(files, repo)
+    except git_history.GitError as exc:
+        logging.debug("Unable to order files by git history: %s", exc)
+        modified = {}
+
+    order = {file: i for i, file in enumerate(files)}
+    return sorted(
+        files,
+        key=lambda file: (-modified.get(file, 0.0), str(file) not in had_errors, order[file]),
+    )
+
+
+def run_within_budget(
+    pool: "Pool",
+    func: Callable[[Task], Result],
+    tasks: Sequence[Task],
+    *,
+    processes: int,
+    deadline: float,
+    not_started: List[Task],
+) -> Iterator[Result]:
+    """Run tasks in order on a pool, yielding results as they complete
+
+    A task is only started if the average time taken by the tasks so far
+    suggests it will finish before the deadline (from time.monotonic). Any
+    tasks which are not started are added to not_started."""
+    completed: queue.SimpleQueue = queue.SimpleQueue()
+    pending = collections.deque(tasks)
+    durations: List[float] = []
+    running = 0
+
+    def _submit(task: Task) -> None:
+        start = time.monotonic()
+        pool.apply_async(
+            func,
+            (task,),
+            callback=lambda result: completed.put((result, time.monotonic() - start)),
+            error_callback=lambda exc: completed.put((exc, None)),
+        )
+
+    while pending or running:
+        while pending and running < processes:
+            estimate = sum(durations) / len(durations) if durations else 0.0
+            if time.monotonic() + estimate > deadline:
+                not_started.extend(pending)
+                pending.clear()
+                break
+            _submit(pending.popleft())
+            running += 1
+
+        if not running:
+            break
+
+        result, duration = completed.get()
+        running -= 1
+        if duration is None:
+            raise result
+        durations.append(duration)
+        yield result
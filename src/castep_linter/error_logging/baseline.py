@@ -0,0 +1,77 @@
+"""Stable fingerprints for diagnostics, used to baseline and compare reports
+
+A fingerprint is a hash of the file name, the message and the text of the line
+the issue is on, so it does not change when unrelated lines are added or
+removed. Identical issues in the same file are numbered in order so that each
+still has its own fingerprint.
+"""
+
+import hashlib
+import json
+import pathlib
+from collections import Counter
+from typing import Dict, Iterable, List, NamedTuple, Set
+
+from castep_linter.error_logging.logger import ErrorLogger
+
+
+def fingerprint_errors(error_log: ErrorLogger) -> None:
+    """Give each message in a log a fingerprint, if it does not already have one"""
+    if all(err.fingerprint is not None for err in error_log.errors):
+        return
+
+    lines = error_log.source_lines()
+
+    seen: Counter = Counter()
+    for err in error_log.errors:
+        row = err.start_point[0]
+        line = lines[row].strip() if row < len(lines) else b""
+        content = (error_log.filename, err.ERROR_TYPE, err.message, line)
+        occurrence = seen[content]
+        seen[content] += 1
+
+        if err.fingerprint is None:
+            digest = hashlib.sha1()  # noqa: S324
+            for part in content:
+                digest.update(part if isinstance(part, bytes) else part.encode())
+                digest.update(b"\0")
+            digest.update(str(occurrence).encode())
+            err.fingerprint = digest.hexdigest()
+
+
+def load_fingerprints(file: pathlib.Path) -> Set[str]:
+    """Read the fingerprints of all the issues in a CodeClimate report"""
+    with open(file, encoding="utf-8") as fd:
+        return {issue["fingerprint"] for issue in json.load(fd)}
+
+
+def apply_baseline(error_logs: Iterable[ErrorLogger], baseline: Set[str]) -> int:
+    """Remove all the messages which are in a baseline, returning the number removed"""
+    removed = 0
+    for error_log in error_logs:
+        fingerprint_errors(error_log)
+        kept = [err for err in error_log.errors if err.fingerprint not in baseline]
+        removed += len(error_log.errors) - len(kept)
+        error_log.errors = kept
+    return removed
+
+
+class ReportDiff(NamedTuple):
+    """Issues only present in the new or old report"""
+
+    introduced: List[dict]
+    fixed: List[dict]
+
+
+def load_report(file: pathlib.Path) -> Dict[str, dict]:
+    """Read a CodeClimate report indexed by fingerprint"""
+    with open(file, encoding="utf-8") as fd:
+        return {issue["fingerprint"]: issue for issue in json.load(fd)}
+
+
+def diff_reports(old: Dict[str, dict], new: Dict[str, dict]) -> ReportDiff:
+    """Find the issues introduced and fixed between two reports"""
+    return ReportDiff(
+        introduced=[issue for key, issue in new.items() if key not in old],
+        fixed=[issue for key, issue in old.items() if key not in new],
+    )
@@ -1,10 +1,13 @@
 """Module to handle errors, warnings and info messages"""
 
 from enum import Enum, auto
-from typing import ClassVar, Dict, Literal
+from typing import ClassVar, Dict, List, Literal, Optional, Tuple
 
 from castep_linter.fortran.fortran_nodes import FortranNode
 
+# (row, column) position in a source file
+Point = Tuple[int, int]
+
 
 class PrintStyle(Enum):
     """Error print styles"""
@@ -20,26 +23,68 @@ class FortranMsgBase:
     ERROR_STYLE: ClassVar[str] = "grey"
     LINE_NUMBER_OFFSET = 8
     ERROR_SEVERITY: ClassVar[int] = 100
+    # Stable identifier for the issue, see baseline.fingerprint_errors
+    fingerprint: Optional[str] = None
 
     def __init__(self, node: FortranNode, message: str) -> None:
         self.message = message
-        self.start_point = node.node.start_point  # TODO FIX
-        self.end_point = node.node.end_point
+        self.start_point: Point = node.node.start_point  # TODO FIX
+        self.end_point: Point = node.node.end_point
+
+    @classmethod
+    def at(cls, start_point: Point, end_point: Point, message: str) -> "FortranMsgBase":
+        """Create a message at a given position without a source node"""
+        msg = cls.__new__(cls)
+        msg.message = message
+        msg.start_point = start_point
+        msg.end_point = end_point
+        return msg
+
+    def shifted(self, lines: int) -> "FortranMsgBase":
+        """Return a copy of the message moved down by a number of lines"""
+        return self.at(
+            (self.start_point[0] + lines, self.start_point[1]),
+            (self.end_point[0] + lines, self.end_point[1]),
+            self.message,
+        )
+
+    def to_record(self) -> list:
+        """Convert the message into a JSON serialisable list"""
+        return [self.ERROR_TYPE, self.message, list(self.start_point), list(self.end_point)]
 
     def print_err(
-        self, filename: str, console, *, print_style: PrintStyle = PrintStyle.ANNOTATED
+        self,
+        filename: str,
+        console,
+        *,
+        print_style: PrintStyle = PrintStyle.ANNOTATED,
+        source: Optional[bytes] = None,
+        lines: Optional[List[bytes]] = None,
     ) -> None:
         """Print the error to the supplied console"""
 
         if print_style is PrintStyle.ANNOTATED:
             console.print(self, style=self.ERROR_STYLE)
-            context = self.context(filename, underline=True)
+            context = self.context(filename, underline=True, source=source, lines=lines)
         elif print_style is PrintStyle.GCC:
             context = self._gcc_format(filename)
 
         if context:
             console.print(context)
 
+    def format_plain(
+        self,
+        filename: str,
+        *,
+        print_style: PrintStyle = PrintStyle.ANNOTATED,
+        lines: Optional[List[bytes]] = None,
+    ) -> str:
+        """Format the error as plain text, as print_err would without any styling"""
+        if print_style is PrintStyle.GCC:
+            return self._gcc_format(filename)
+        text = f"{self!r}\n{self.context(filename, underline=True, lines=lines)}"
+        return "\n".join(line.expandtabs() for line in text.split("\n"))
+
     def _gcc_format(self, filename):
         """Format errors like the GCC"""
         start_line, _ = self.line_ranges
@@ -47,33 +92,46 @@ class FortranMsgBase:
 
         return f"{filename}:{start_line+1}:{start_char}: {self.ERROR_TYPE}: {self.message}"
 
-    def context(self, filename, *, underline=False):
-        """Print a line of context for the current error"""
-        context = ""
-
-        with open(filename, "rb") as fd:
-            start_line, _ = self.line_ranges
-            start_char, _ = self.char_ranges
-
-            file_str = str(filename)
-
-            line = fd.read().splitlines()[start_line].decode(errors="replace")
-
-            # Fix the correct number of error characters on a multiline error
-            if self.num_lines > 1:
-                num_chars = len(line) - start_char
-            else:
-                num_chars = self.num_chars
-
-            context = f"{file_str}:{start_line+1:{self.LINE_NUMBER_OFFSET}}>{line}"
-            if underline:
-                context += (
-                    "\n"
-                    + " " * (len(file_str) + 1)
-                    + " " * (self.LINE_NUMBER_OFFSET + 1)
-                    + " " * start_char
-                    + "^" * num_chars
-                )
+    def context(
+        self,
+        filename,
+        *,
+        underline=False,
+        source: Optional[bytes] = None,
+        lines: Optional[List[bytes]] = None,
+    ):
+        """Print a line of context for the current error
+
+        The source text is read from filename unless it is supplied directly,
+        eg for files read from an archive, or already split into lines"""
+        if lines is None:
+            if source is None:
+                with open(filename, "rb") as fd:
+                    source = fd.read()
+            lines = source.splitlines()
+
+        start_line, _ = self.line_ranges
+        start_char, _ = self.char_ranges
+
+        file_str = str(filename)
+
+        line = lines[start_line].decode(errors="replace")
+
+        # Fix the correct number of error characters on a multiline error
+        if self.num_lines > 1:
+            num_chars = len(line) - start_char
+        else:
+            num_chars = self.num_chars
+
+        context = f"{file_str}:{start_line+1:{self.LINE_NUMBER_OFFSET}}>{line}"
+        if underline:
+            context += (
+                "\n"
+                + " " * (len(file_str) + 1)
+                + " " * (self.LINE_NUMBER_OFFSET + 1)
+                + " " * start_char
+                + "^" * num_chars
+            )
         return context
 
     @property
@@ -124,8 +182,8 @@ class FortranInfo(FortranMsgBase):
     ERROR_SEVERITY: ClassVar[int] = 0
 
 
-def new_fortran_error(level: str, node: FortranNode, message: str) -> FortranMsgBase:
-    """Generate a new fortran diagnostic message"""
+def fortran_error_class(level: str) -> type[FortranMsgBase]:
+    """Get the diagnostic message class for a level"""
     cls = FortranMsgBase
     if level == "Error":
         cls = FortranError
@@ -135,7 +193,18 @@ def new_fortran_error(level: str, node: FortranNode, message: str) -> FortranMsg
         cls = FortranInfo
     else:
         raise ValueError("Unknown fortran diagnostic message type: " + level)
-    return cls(node, message)
+    return cls
+
+
+def fortran_error_from_record(record: list) -> FortranMsgBase:
+    """Recreate a diagnostic message from FortranMsgBase.to_record"""
+    level, message, start, end = record
+    return fortran_error_class(level).at(tuple(start), tuple(end), message)
+
+
+def new_fortran_error(level: str, node: FortranNode, message: str) -> FortranMsgBase:
+    """Generate a new fortran diagnostic message"""
+    return fortran_error_class(level)(node, message)
 
 
 ErrorNames = Literal["Error", "Warn", "Info"]
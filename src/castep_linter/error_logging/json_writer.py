@@ -5,6 +5,7 @@ from enum import Enum, auto
 from pathlib import Path
 from typing import Literal, TypedDict
 
+from castep_linter.error_logging.baseline import fingerprint_errors
 from castep_linter.error_logging.error_types import FORTRAN_ERRORS
 from castep_linter.error_logging.logger import ErrorLogger
 
@@ -96,11 +97,14 @@ def write_jenkins(file: Path, error_logs: dict[str, ErrorLogger], error_level: i
 
 
 def write_codeclimate(file: Path, error_logs: dict[str, ErrorLogger], error_level: int) -> None:
+    for log in error_logs.values():
+        fingerprint_errors(log)
+
     issues: list[CodeClimateIssue] = [
         CodeClimateIssue(
             check_name=determine_type(error.message),
             description=error.message,
-            fingerprint=str(abs(hash(scanned_file + error.message))),
+            fingerprint=error.fingerprint or "",
             severity=CodeClimate_severity_dict[error.ERROR_SEVERITY],
             location={"path": scanned_file, "lines": {"begin": error.start_point[0]}},
         )
@@ -141,4 +145,13 @@ def determine_type(message: str) -> str:
     if "Missing trace_" in message or "Incorrect name" in message:
         return "TRACE"
 
+    if "Tab character" in message:
+        return "TABS"
+
+    if "DOS line endings" in message:
+        return "LINE_ENDING"
+
+    if "Trailing whitespace" in message:
+        return "WHITESPACE"
+
     return "UNKNOWN"
@@ -2,12 +2,14 @@
 
 from collections import Counter
 from dataclasses import dataclass, field
-from typing import Iterator, List
-
-from rich.console import Console
+from typing import TYPE_CHECKING, Iterator, List, Optional
 
 from castep_linter.error_logging import error_types
 from castep_linter.fortran.fortran_nodes import FortranNode
+from castep_linter.suppressions import SuppressionIndex
+
+if TYPE_CHECKING:
+    from rich.console import Console
 
 
 @dataclass
@@ -17,28 +19,109 @@ class ErrorLogger:
 
     filename: str
     errors: List[error_types.FortranMsgBase] = field(default_factory=list)
+    # Source text for files which cannot be re-read from disk, eg archive members
+    source: Optional[bytes] = None
+    # Hash of the source text that was scanned, for the journal
+    digest: Optional[str] = None
+    # Messages less severe than this are dropped without being created
+    min_severity: int = 0
+    # Inline suppression comments in the file, and the type of rule being run
+    suppressions: Optional[SuppressionIndex] = None
+    rule_type: str = "UNKNOWN"
+    # Messages after the first max_errors are dropped, and truncated set once it is reached
+    max_errors: Optional[int] = None
+    truncated: bool = False
 
     def __iter__(self) -> Iterator[error_types.FortranMsgBase]:
         return iter(self.errors)
 
     def add_msg(self, level: str, node: FortranNode, message: str):
         """Add an error to the error list"""
-        err = error_types.new_fortran_error(level, node, message)
-        self.errors.append(err)
+        cls = error_types.fortran_error_class(level)
+        if self._accepts(cls, node.node.start_point):
+            self._append(cls(node, message))
+
+    def add_msg_at(
+        self,
+        level: str,
+        start_point: error_types.Point,
+        end_point: error_types.Point,
+        message: str,
+    ):
+        """Add an error at a position in the source rather than at a node"""
+        cls = error_types.fortran_error_class(level)
+        if self._accepts(cls, start_point):
+            self._append(cls.at(start_point, end_point, message))
+
+    def _accepts(self, cls: type[error_types.FortranMsgBase], start: error_types.Point) -> bool:
+        """Should a message be created, checked before doing so"""
+        if cls.ERROR_SEVERITY < self.min_severity:
+            return False
+        if self.suppressions is not None and self.suppressions.is_suppressed(
+            self.rule_type, start[0]
+        ):
+            return False
+        return not self.full
+
+    def _append(self, msg: error_types.FortranMsgBase) -> None:
+        """Add a message, noting if no more can be added"""
+        self.errors.append(msg)
+        if self.full:
+            self.truncated = True
+
+    @property
+    def full(self) -> bool:
+        """Has the log reached its maximum number of messages"""
+        return self.max_errors is not None and len(self.errors) >= self.max_errors
+
+    def truncate(self) -> None:
+        """Drop any messages beyond the maximum, eg after merging logs"""
+        if self.max_errors is not None and len(self.errors) > self.max_errors:
+            del self.errors[self.max_errors :]
+            self.truncated = True
 
     def print_errors(
         self,
-        console: Console,
+        console: "Console",
         level: str = "Warning",
         *,
         print_style: error_types.PrintStyle = error_types.PrintStyle.ANNOTATED,
     ) -> None:
         """Print all the contained errors above the level"""
         severity = error_types.ERROR_SEVERITY[level]
+        lines = None
+        if print_style is error_types.PrintStyle.ANNOTATED and self.errors:
+            lines = self.source_lines()
 
         for err in self.errors:
             if err.ERROR_SEVERITY >= severity:
-                err.print_err(self.filename, console, print_style=print_style)
+                err.print_err(self.filename, console, print_style=print_style, lines=lines)
+
+    def format_errors(
+        self,
+        level: str = "Warning",
+        *,
+        print_style: error_types.PrintStyle = error_types.PrintStyle.ANNOTATED,
+    ) -> str:
+        """Format all the contained errors above the level as plain text, one per line"""
+        severity = error_types.ERROR_SEVERITY[level]
+        errors = [err for err in self.errors if err.ERROR_SEVERITY >= severity]
+        if not errors:
+            return ""
+
+        lines = self.source_lines() if print_style is error_types.PrintStyle.ANNOTATED else None
+        formatted = [
+            err.format_plain(self.filename, print_style=print_style, lines=lines) for err in errors
+        ]
+        return "\n".join(formatted) + "\n"
+
+    def source_lines(self) -> List[bytes]:
+        """Get the lines of the source file, reading it from disk if needed"""
+        source = self.source
+        if source is None:
+            with open(self.filename, "rb") as fd:
+                source = fd.read()
+        return source.splitlines()
 
     def count_errors(self):
         """Count the number of errors in each category"""
@@ -0,0 +1,74 @@
+"""Module to stream code linting errors as newline delimited json
+
+Each line is a single compact record, so output from many runs or shards can
+be appended to the same file and read back one line at a time.
+"""
+
+import json
+import pathlib
+from typing import TextIO, Union
+
+from castep_linter.error_logging.baseline import fingerprint_errors
+from castep_linter.error_logging.json_writer import determine_type
+from castep_linter.error_logging.logger import ErrorLogger
+
+
+class NdjsonWriter:
+    """Append one record per diagnostic to a file as each file is finished
+
+    An already open stream, like stdout, can be given instead of a file name,
+    in which case it is not closed with the writer."""
+
+    def __init__(self, file: Union[pathlib.Path, TextIO], error_level: int):
+        self.error_level = error_level
+        self._owned = isinstance(file, pathlib.Path)
+        self._fd: TextIO
+        if isinstance(file, pathlib.Path):
+            self._fd = open(file, "a", encoding="utf-8")
+        else:
+            self._fd = file
+
+    def write_log(self, error_log: ErrorLogger) -> None:
+        """Write out all the diagnostics for a file above the error level"""
+        fingerprint_errors(error_log)
+        for error in error_log.errors:
+            if error.ERROR_SEVERITY < self.error_level:
+                continue
+            record = {
+                "path": error_log.filename,
+                "rule": determine_type(error.message),
+                "severity": error.ERROR_TYPE,
+                # Start line, start column, end line, end column, all 0-indexed
+                "pos": [*error.start_point, *error.end_point],
+                "message": error.message,
+                "fingerprint": error.fingerprint,
+            }
+            self._write(record)
+        self._fd.flush()
+
+    def write_end(self, error_log: ErrorLogger) -> None:
+        """Mark that all the diagnostics for a file have been written"""
+        issues = sum(err.ERROR_SEVERITY >= self.error_level for err in error_log.errors)
+        self._write(
+            {
+                "path": error_log.filename,
+                "done": True,
+                "issues": issues,
+                "truncated": error_log.truncated,
+            }
+        )
+        self._fd.flush()
+
+    def _write(self, record: dict) -> None:
+        self._fd.write(json.dumps(record, separators=(",", ":")) + "\n")
+
+    def close(self) -> None:
+        """Close the output file, if it was opened by the writer"""
+        if self._owned:
+            self._fd.close()
+
+    def __enter__(self) -> "NdjsonWriter":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
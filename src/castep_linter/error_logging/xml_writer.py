@@ -1,27 +1,42 @@
 """Module to write code linting errors in JUnit XML format"""
 
 from pathlib import Path
-from typing import Dict
+from typing import Dict, Iterable
 
 from junitparser import Error, JUnitXml, Skipped, TestCase, TestSuite  # type: ignore
 
 from castep_linter.error_logging.logger import ErrorLogger
 
 
-def write_xml(file: Path, error_logs: Dict[str, ErrorLogger], error_level: int):
-    """write code linting errors in JUnit XML format"""
+def write_xml(
+    file: Path,
+    error_logs: Dict[str, ErrorLogger],
+    error_level: int,
+    *,
+    not_scanned: Iterable[str] = (),
+):
+    """write code linting errors in JUnit XML format, marking any files which
+    were not scanned as skipped"""
     xml = JUnitXml()
     for scanned_file, log in error_logs.items():
         suite = TestSuite(scanned_file)
 
         for error in log.errors:
             case = TestCase(str(error))
+            context = error.context(scanned_file, underline=True, source=log.source)
             if error.ERROR_SEVERITY >= error_level:
-                case.result = [Error(error.context(scanned_file, underline=True))]
+                case.result = [Error(context)]
             else:
-                case.result = [Skipped(error.context(scanned_file, underline=True))]
+                case.result = [Skipped(context)]
             suite.add_testcase(case)
 
         xml.add_testsuite(suite)
 
+    for unscanned_file in not_scanned:
+        suite = TestSuite(unscanned_file)
+        case = TestCase("Not scanned")
+        case.result = [Skipped("File was not scanned within the time budget")]
+        suite.add_testcase(case)
+        xml.add_testsuite(suite)
+
     xml.write(str(file))
@@ -2,7 +2,6 @@
 
 from typing import Callable, List, Optional, Tuple
 
-from rich.console import Console
 from tree_sitter import Node
 
 from castep_linter.fortran import node_factory
@@ -96,6 +95,8 @@ class FortranNode:
     def print_tree(self, printfn: Optional[Callable] = None, indent: int = 0):
         """Prints a representation of the tree"""
         if not printfn:
+            from rich.console import Console
+
             printfn = Console().print
 
         if self.node.is_named:
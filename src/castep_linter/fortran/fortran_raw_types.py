@@ -43,3 +43,4 @@ class FType(Enum):
 
 FortranLookup = {k.value: k for k in Fortran}
 FortranContexts = {Fortran.SUBROUTINE, Fortran.FUNCTION}
+ROUTINE_TYPES = {context.value for context in FortranContexts}
@@ -1,27 +1,49 @@
 """Tests for Fortran code in CASTEP"""
 
+import functools
 import pathlib
-from typing import Callable, Generator, Optional
+from typing import Callable, Generator, List, Optional
 
 import tree_sitter_fortran
-from tree_sitter import Language, Parser
+from tree_sitter import Language, Node, Parser, Range
 
 from castep_linter.fortran import node_factory
 from castep_linter.fortran.fortran_nodes import FortranNode
 
+FORTRAN_EXTENSIONS = {".f", ".f90", ".f95", ".f03", ".f08"}
+
+
+def is_fortran_file(name: str) -> bool:
+    """Check whether a file name has a (case insensitive) Fortran extension"""
+    return pathlib.PurePath(name).suffix.lower() in FORTRAN_EXTENSIONS
+
+
+@functools.lru_cache(maxsize=None)
+def get_fortran_language() -> Language:
+    """Get the tree-sitter-fortran language"""
+    return Language(tree_sitter_fortran.language())
+
 
 def get_fortran_parser() -> Parser:
     """Get a tree-sitter-fortran parser from fortran_language_pack"""
-    return Parser(Language(tree_sitter_fortran.language()))
+    return Parser(get_fortran_language())
 
 
 class FortranTree:
     """Parsed fortran source code tree"""
 
-    def __init__(self, raw_text: bytes, parser: Optional[Parser] = None):
-        if parser is None:
+    def __init__(
+        self,
+        raw_text: bytes,
+        parser: Optional[Parser] = None,
+        included_ranges: Optional[List[Range]] = None,
+    ):
+        if parser is None or included_ranges is not None:
             parser = get_fortran_parser()
 
+        if included_ranges is not None:
+            parser.included_ranges = included_ranges
+
         self.raw_text = raw_text
         self.tree = parser.parse(self.raw_text)
 
@@ -32,9 +54,14 @@ class FortranTree:
             raw_text = fd.read()
         return FortranTree(raw_text)
 
-    def walk(self) -> Generator[FortranNode, None, None]:
-        """Traverse a tree-sitter tree in a depth first search"""
-        cursor = self.tree.walk()
+    def walk(self, root: Optional[Node] = None) -> Generator[FortranNode, None, None]:
+        """Traverse a tree-sitter tree, or the subtree below root, in a depth first search"""
+        for node in self.walk_raw(root):
+            yield node_factory.wrap_node(node)
+
+    def walk_raw(self, root: Optional[Node] = None) -> Generator[Node, None, None]:
+        """Traverse the tree as in walk, but without wrapping the tree-sitter nodes"""
+        cursor = self.tree.walk() if root is None else root.walk()
 
         reached_root = False
         while not reached_root:
@@ -42,7 +69,7 @@ class FortranTree:
                 err = "Reached end of tree unexpectedly"
                 raise EOFError(err)
 
-            yield node_factory.wrap_node(cursor.node)
+            yield cursor.node
 
             if cursor.goto_first_child():
                 continue
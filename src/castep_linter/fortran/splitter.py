@@ -0,0 +1,84 @@
+"""Split large source files into pieces which can be linted independently"""
+
+from dataclasses import dataclass
+from typing import Iterator, List, Tuple
+
+from tree_sitter import Node, Range
+
+from castep_linter.fortran.fortran_raw_types import ROUTINE_TYPES
+from castep_linter.fortran.parser import FortranTree
+
+# (start_byte, end_byte, start_point, end_point) - a picklable tree_sitter.Range
+ByteRange = Tuple[int, int, Tuple[int, int], Tuple[int, int]]
+
+
+@dataclass
+class Piece:
+    """A set of byte ranges of a source file to be parsed and linted together"""
+
+    index: int
+    ranges: List[ByteRange]
+
+    def included_ranges(self) -> List[Range]:
+        """Convert to ranges for the tree-sitter parser"""
+        return [
+            Range(start_point, end_point, start_byte, end_byte)
+            for start_byte, end_byte, start_point, end_point in self.ranges
+        ]
+
+
+def _point(point: Tuple[int, int]) -> Tuple[int, int]:
+    """Convert a tree-sitter point to a plain tuple, so that it can be pickled"""
+    return (point[0], point[1])
+
+
+def outermost_routines(fort_tree: FortranTree) -> Iterator[Node]:
+    """Find subroutines and functions not contained in another routine, in source order"""
+    stack = [fort_tree.tree.root_node]
+    while stack:
+        node = stack.pop()
+        if node.type in ROUTINE_TYPES:
+            yield node
+        else:
+            stack.extend(reversed(node.named_children))
+
+
+def split_tree(fort_tree: FortranTree, num_pieces: int) -> List[Piece]:
+    """Split a source tree at routine boundaries into at most num_pieces groups of
+    routines of similar size, plus one piece for everything outside the routines"""
+    routines = list(outermost_routines(fort_tree))
+    if not routines:
+        return []
+
+    total_size = sum(node.end_byte - node.start_byte for node in routines)
+    target_size = total_size / max(num_pieces, 1)
+
+    pieces: List[Piece] = []
+    current: List[ByteRange] = []
+    current_size = 0
+    for node in routines:
+        current.append(
+            (node.start_byte, node.end_byte, _point(node.start_point), _point(node.end_point))
+        )
+        current_size += node.end_byte - node.start_byte
+        if current_size >= target_size:
+            pieces.append(Piece(len(pieces), current))
+            current, current_size = [], 0
+    if current:
+        pieces.append(Piece(len(pieces), current))
+
+    # The code between routines, eg module headers and declarations
+    gaps: List[ByteRange] = []
+    last_byte, last_point = 0, (0, 0)
+    for node in routines:
+        if node.start_byte > last_byte:
+            gaps.append((last_byte, node.start_byte, last_point, _point(node.start_point)))
+        last_byte, last_point = node.end_byte, _point(node.end_point)
+
+    root = fort_tree.tree.root_node
+    if root.end_byte > last_byte:
+        gaps.append((last_byte, root.end_byte, last_point, _point(root.end_point)))
+    if gaps:
+        pieces.append(Piece(len(pieces), gaps))
+
+    return pieces
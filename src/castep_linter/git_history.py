@@ -0,0 +1,135 @@
+"""Read Fortran sources for a range of revisions straight from the git object store"""
+
+import pathlib
+import subprocess
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from castep_linter.fortran.parser import is_fortran_file
+
+# Mapping of file path -> blob hash for a single revision
+RevisionTree = Dict[str, str]
+
+
+class GitError(Exception):
+    """Exception thrown when a git command fails"""
+
+
+def _git(args: List[str], repo: Optional[pathlib.Path] = None) -> bytes:
+    """Run a git command and return its standard output"""
+    cmd = ["git"]
+    if repo is not None:
+        cmd += ["-C", str(repo)]
+    try:
+        result = subprocess.run(cmd + args, capture_output=True, check=True)  # noqa: S603
+    except subprocess.CalledProcessError as exc:
+        err = f"git {' '.join(args)} failed: {exc.stderr.decode(errors='replace').strip()}"
+        raise GitError(err) from exc
+    return result.stdout
+
+
+def expand_revisions(revs: Iterable[str], repo: Optional[pathlib.Path] = None) -> List[str]:
+    """Expand a list of revisions and REV1..REV2 ranges into commit hashes, oldest first"""
+    commits: List[str] = []
+    for rev in revs:
+        if ".." in rev:
+            out = _git(["rev-list", "--reverse", rev], repo)
+        else:
+            out = _git(["rev-parse", "--verify", f"{rev}^{{commit}}"], repo)
+        commits.extend(out.decode().split())
+    return commits
+
+
+def list_fortran_blobs(rev: str, repo: Optional[pathlib.Path] = None) -> RevisionTree:
+    """Get the path and blob hash of every Fortran file in a revision"""
+    out = _git(["ls-tree", "-r", "-z", rev], repo)
+
+    tree: RevisionTree = {}
+    for entry in out.split(b"\0"):
+        if not entry:
+            continue
+        meta, _, file_path = entry.partition(b"\t")
+        _, obj_type, sha = meta.split()
+        name = file_path.decode(errors="replace")
+        if obj_type == b"blob" and is_fortran_file(name):
+            tree[name] = sha.decode()
+    return tree
+
+
+def read_blobs(
+    shas: Iterable[str], repo: Optional[pathlib.Path] = None
+) -> Iterator[Tuple[str, bytes]]:
+    """Stream the contents of blobs from the object store using a single git process"""
+    cmd = ["git"]
+    if repo is not None:
+        cmd += ["-C", str(repo)]
+    cmd += ["cat-file", "--batch"]
+
+    with subprocess.Popen(cmd, stdin=subprocess.PIPE, stdout=subprocess.PIPE) as proc:  # noqa: S603
+        if proc.stdin is None or proc.stdout is None:
+            err = "Unable to open pipe to git cat-file"
+            raise GitError(err)
+
+        try:
+            for sha in shas:
+                proc.stdin.write(sha.encode() + b"\n")
+                proc.stdin.flush()
+
+                header = proc.stdout.readline().split()
+                if len(header) != 3:  # noqa: PLR2004
+                    err = f"Unable to read blob {sha} from git"
+                    raise GitError(err)
+
+                size = int(header[2])
+                data = proc.stdout.read(size)
+                proc.stdout.read(1)  # Trailing newline
+                yield sha, data
+        finally:
+            proc.stdin.close()
+
+
+def last_modified(
+    files: Iterable[pathlib.Path], repo: Optional[pathlib.Path] = None
+) -> Dict[pathlib.Path, float]:
+    """Get the time of the last commit to change each file, or infinity if it has
+    uncommitted changes. Files which are not in the repository are left out."""
+    top_level = pathlib.Path(_git(["rev-parse", "--show-toplevel"], repo).decode().strip())
+
+    wanted: Dict[str, pathlib.Path] = {}
+    for file in files:
+        try:
+            wanted[file.resolve().relative_to(top_level).as_posix()] = file
+        except ValueError:
+            continue
+
+    times: Dict[pathlib.Path, float] = {}
+    status = _git(["status", "--porcelain", "-z", "--untracked-files=all"], repo)
+    for entry in status.split(b"\0"):
+        name = entry[3:].decode(errors="replace")
+        if name in wanted:
+            times[wanted.pop(name)] = float("inf")
+
+    if not wanted:
+        return times
+
+    # Walk back through history only until every file has been seen
+    cmd = ["git", "-C", str(top_level), "log", "--format=%x01%ct", "--name-only", "--no-renames"]
+    with subprocess.Popen(  # noqa: S603
+        cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL
+    ) as proc:
+        if proc.stdout is None:
+            err = "Unable to open pipe to git log"
+            raise GitError(err)
+
+        commit_time = 0.0
+        for line in proc.stdout:
+            if line.startswith(b"\x01"):
+                commit_time = float(line[1:])
+                continue
+            name = line.rstrip(b"\n").decode(errors="replace")
+            if name in wanted:
+                times[wanted.pop(name)] = commit_time
+                if not wanted:
+                    proc.terminate()
+                    break
+
+    return times
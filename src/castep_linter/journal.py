@@ -0,0 +1,110 @@
+"""Record the results for each file as soon as it has been scanned
+
+The journal is a JSON lines file. The first line holds the settings the scan
+was run with, and each following line the content hash and diagnostics of one
+file. If a scan is interrupted, rerunning it with the same journal and resume
+set only rescans files which are missing from the journal or have changed.
+"""
+
+import json
+import logging
+import pathlib
+from typing import Dict, Optional, Tuple
+
+from castep_linter.error_logging import ErrorLogger
+from castep_linter.error_logging.error_types import fortran_error_from_record
+
+JOURNAL_VERSION = 1
+
+
+class Journal:
+    """Append only log of the results for each scanned file"""
+
+    def __init__(self, file: pathlib.Path, settings: dict, *, resume: bool = False):
+        self.file = file
+        self.settings = {"version": JOURNAL_VERSION, **settings}
+        # Results for each file name, with the hash of the contents they are for
+        self.entries: Dict[str, Tuple[str, ErrorLogger]] = {}
+
+        if not (resume and self._load()):
+            with self.file.open("w", encoding="utf-8") as fd:
+                fd.write(json.dumps(self.settings) + "\n")
+
+        self._fd = self.file.open("a", encoding="utf-8")
+
+    def _load(self) -> bool:
+        """Read the complete entries in the journal, returning False if it cannot be used"""
+        try:
+            with self.file.open("rb") as fd:
+                data = fd.read()
+        except OSError:
+            return False
+
+        good_end = 0
+        for line_end, line in _lines(data):
+            try:
+                record = json.loads(line)
+            except ValueError:
+                # Partially written by an interrupted scan
+                break
+
+            if good_end == 0:
+                if record != self.settings:
+                    logging.info("Journal %s was made with other settings, restarting", self.file)
+                    return False
+            else:
+                error_log = ErrorLogger(record["file"], truncated=record.get("truncated", False))
+                error_log.errors = [fortran_error_from_record(err) for err in record["errors"]]
+                self.entries[record["file"]] = (record["hash"], error_log)
+            good_end = line_end
+
+        if good_end == 0:
+            return False
+
+        # Drop anything after the last complete entry so new entries start on a new line
+        if good_end < len(data):
+            with self.file.open("r+b") as fd:
+                fd.truncate(good_end)
+
+        logging.debug("Resuming from %d files in journal %s", len(self.entries), self.file)
+        return True
+
+    def lookup(self, filename: str, digest: str) -> Optional[ErrorLogger]:
+        """Get the journalled results for a file, if its contents have not changed"""
+        entry = self.entries.get(filename)
+        if entry is None or entry[0] != digest:
+            return None
+        return entry[1]
+
+    def record(self, error_log: ErrorLogger, digest: str) -> None:
+        """Append the results for a file to the journal"""
+        self.entries[error_log.filename] = (digest, error_log)
+        record = {
+            "file": error_log.filename,
+            "hash": digest,
+            "errors": [err.to_record() for err in error_log.errors],
+            "truncated": error_log.truncated,
+        }
+        self._fd.write(json.dumps(record) + "\n")
+        self._fd.flush()
+
+    def close(self) -> None:
+        """Close the journal file"""
+        self._fd.close()
+
+    def __enter__(self) -> "Journal":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def _lines(data: bytes):
+    """Iterate over the complete lines in some bytes, with the offset of their end"""
+    start = 0
+    while True:
+        end = data.find(b"\n", start)
+        if end < 0:
+            return
+        yield end + 1, data[start:end]
+        start = end + 1
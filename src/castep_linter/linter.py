@@ -0,0 +1,113 @@
+"""Lint Fortran from other Python programs without going through the command line
+
+    linter = Linter(rules={"LITERAL_KIND"}, level="Warn")
+    error_log = linter.lint_bytes(source, "foo.f90")
+    for error_log in linter.lint_paths(files):
+        ...
+
+An executor, eg a concurrent.futures.ProcessPoolExecutor, can be given to scan
+several files at once. The async methods run the scans on the executor, or the
+event loop's default executor, so that they do not block the loop.
+"""
+
+import argparse
+import asyncio
+import pathlib
+from concurrent.futures import Executor, as_completed
+from typing import AsyncIterator, Iterable, Iterator, Optional
+
+from castep_linter.error_logging import ERROR_SEVERITY, ErrorLogger
+from castep_linter.fortran.parser import get_fortran_language
+from castep_linter.scan_files import scan_file, scan_source
+from castep_linter.tests import RULE_TYPES
+
+
+class Linter:
+    """Scans Fortran source with a fixed set of rules and settings"""
+
+    def __init__(
+        self,
+        rules: Optional[Iterable[str]] = None,
+        level: str = "Info",
+        *,
+        max_diagnostics: Optional[int] = None,
+        cache: Optional[pathlib.Path] = None,
+        index: Optional[pathlib.Path] = None,
+        cpp_variants: Optional[Iterable[Iterable[str]]] = None,
+        executor: Optional[Executor] = None,
+    ):
+        rule_set = None if rules is None else {rule.upper() for rule in rules}
+        if rule_set is not None and not rule_set <= set(RULE_TYPES):
+            unknown = ", ".join(sorted(rule_set - set(RULE_TYPES)))
+            err = f"Unknown rule types {unknown}. Choose from {', '.join(RULE_TYPES)}"
+            raise ValueError(err)
+        if level not in ERROR_SEVERITY:
+            err = f"Unknown level {level}. Choose from {', '.join(ERROR_SEVERITY)}"
+            raise ValueError(err)
+
+        # The same settings the command line scanners use, so results are identical
+        self.args = argparse.Namespace(
+            rules=rule_set,
+            level=level,
+            max_diagnostics=max_diagnostics,
+            cache=cache,
+            index=index,
+            cpp_variants=None if cpp_variants is None else [tuple(v) for v in cpp_variants],
+            journal=None,
+            print_tree=False,
+        )
+        self.executor = executor
+
+        # Load the grammar now, rather than during the first scan
+        get_fortran_language()
+
+    def lint_bytes(self, source: bytes, filename: str = "<source>") -> ErrorLogger:
+        """Scan some source code, reporting issues against filename"""
+        error_log = scan_source(filename, source, self.args)
+        error_log.source = source
+        return error_log
+
+    def lint_path(self, file: pathlib.Path) -> ErrorLogger:
+        """Scan a source file on disk"""
+        return scan_file(pathlib.Path(file), self.args)
+
+    def lint_paths(self, files: Iterable[pathlib.Path]) -> Iterator[ErrorLogger]:
+        """Scan source files, yielding the results for each as soon as it is finished
+
+        Without an executor the files are scanned one at a time, in order."""
+        if self.executor is None:
+            for file in files:
+                yield self.lint_path(file)
+            return
+
+        futures = [self.executor.submit(scan_file, pathlib.Path(file), self.args) for file in files]
+        try:
+            for future in as_completed(futures):
+                yield future.result()
+        finally:
+            # Nothing more is wanted if the caller stops early
+            for future in futures:
+                future.cancel()
+
+    async def lint_bytes_async(self, source: bytes, filename: str = "<source>") -> ErrorLogger:
+        """Scan some source code on the executor"""
+        loop = asyncio.get_running_loop()
+        error_log = await loop.run_in_executor(
+            self.executor, scan_source, filename, source, self.args
+        )
+        error_log.source = source
+        return error_log
+
+    async def lint_paths_async(self, files: Iterable[pathlib.Path]) -> AsyncIterator[ErrorLogger]:
+        """Scan source files on the executor, yielding the results as they finish"""
+        loop = asyncio.get_running_loop()
+        futures = [
+            loop.run_in_executor(self.executor, scan_file, pathlib.Path(file), self.args)
+            for file in files
+        ]
+        try:
+            for future in asyncio.as_completed(futures):
+                yield await future
+        finally:
+            for future in futures:
+                future.cancel()
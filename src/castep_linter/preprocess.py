@@ -0,0 +1,205 @@
+"""Run the C preprocessor over sources with #ifdef blocks, once per set of defines
+
+Without preprocessing the parser only sees whichever branches of an #ifdef
+happen to parse. Instead each configured set of defines produces a variant of
+the file, and the rules are run on every distinct variant. The line markers
+cpp writes map each line of a variant back to the line of the original file it
+came from, so issues are reported against the original source.
+
+The preprocessors for the different sets of defines run concurrently, and
+their output is cached by the source text, defines and include directory. The
+hashes of the files it includes are stored with the output, so it is not used
+again once any of them has changed.
+"""
+
+import hashlib
+import json
+import logging
+import pathlib
+import re
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from castep_linter.error_logging.error_types import FortranMsgBase
+from castep_linter.storage import file_digest, write_atomic
+
+# Traditional mode leaves Fortran operators and comments alone, and no predefined
+# macros or system headers means identifiers such as "linux" are not replaced
+CPP_COMMAND = ["cpp", "-traditional-cpp", "-nostdinc", "-undef"]
+
+DIRECTIVE = re.compile(rb"^[ \t]*#", re.MULTILINE)
+LINE_MARKER = re.compile(rb'^# (\d+) "(.*)"')
+INCLUDED_FILE = re.compile(rb'^# \d+ "([^"<][^"]*)"', re.MULTILINE)
+STDIN = b"<stdin>"
+
+Defines = Tuple[str, ...]
+
+
+def has_directives(raw_text: bytes) -> bool:
+    """Could preprocessing change a source, ie does it have any directives"""
+    return DIRECTIVE.search(raw_text) is not None
+
+
+@dataclass
+class Variant:
+    """The text of a file as preprocessed with one set of defines"""
+
+    # The defines, eg "MPI,DEBUG=1"
+    name: str
+    text: bytes
+    # Line of the original file each line of text came from, None for included files
+    lines: List[Optional[int]]
+
+    def map_errors(self, errors: Iterable[FortranMsgBase]) -> Iterator[FortranMsgBase]:
+        """Move messages to the lines of the original file, dropping any in included files"""
+        for err in errors:
+            start_line = self._original_line(err.start_point[0])
+            if start_line is None:
+                continue
+            end_line = self._original_line(err.end_point[0])
+            if end_line is None or end_line < start_line:
+                end_line = start_line
+            yield err.at(
+                (start_line, err.start_point[1]), (end_line, err.end_point[1]), err.message
+            )
+
+    def _original_line(self, line: int) -> Optional[int]:
+        return self.lines[line] if line < len(self.lines) else None
+
+
+def split_line_markers(output: bytes) -> Tuple[bytes, List[Optional[int]]]:
+    """Remove the line markers from cpp output, noting where each remaining line came from"""
+    text = []
+    lines: List[Optional[int]] = []
+    current_file = None
+    line = 0
+    for output_line in output.splitlines(keepends=True):
+        marker = LINE_MARKER.match(output_line)
+        if marker:
+            line = int(marker[1]) - 1
+            current_file = marker[2]
+            continue
+        text.append(output_line)
+        lines.append(line if current_file == STDIN else None)
+        line += 1
+    return b"".join(text), lines
+
+
+def cache_key(raw_text: bytes, defines: Defines, include_dir: pathlib.Path) -> str:
+    """Identify the output of preprocessing a source with some defines"""
+    digest = hashlib.sha1()  # noqa: S324
+    digest.update("\0".join([*CPP_COMMAND, *defines, str(include_dir)]).encode() + b"\0\0")
+    digest.update(raw_text)
+    return digest.hexdigest()
+
+
+def included_files(output: bytes, include_dir: pathlib.Path) -> List[str]:
+    """Get the files cpp included to produce some output, from its line markers"""
+    names = {match[1].decode(errors="replace") for match in INCLUDED_FILE.finditer(output)}
+    return sorted(str(include_dir / name) for name in names)
+
+
+def _file_digest(name: str, digests: Dict[str, Optional[str]]) -> Optional[str]:
+    """Hash an included file, once per call to preprocess_variants"""
+    if name not in digests:
+        try:
+            digests[name] = file_digest(pathlib.Path(name))
+        except OSError:
+            digests[name] = None
+    return digests[name]
+
+
+def run_cpp(raw_text: bytes, defines: Defines, include_dir: pathlib.Path) -> bytes:
+    """Preprocess a source, with includes relative to its directory as when compiling it"""
+    command = [*CPP_COMMAND, *(f"-D{define}" for define in defines), f"-I{include_dir}", "-"]
+    return subprocess.run(  # noqa: S603
+        command,
+        input=raw_text,
+        capture_output=True,
+        check=True,
+        # Archive members have no directory on disk
+        cwd=include_dir if include_dir.is_dir() else None,
+    ).stdout
+
+
+def _read_cache(
+    cache_dir: Optional[pathlib.Path], key: str, digests: Dict[str, Optional[str]]
+) -> Optional[bytes]:
+    """Get cached output, if none of the files it includes have changed"""
+    if cache_dir is None:
+        return None
+    try:
+        header, output = (cache_dir / f"{key}.i").read_bytes().split(b"\n", 1)
+        included = json.loads(header)
+    except (OSError, ValueError):
+        return None
+    if any(_file_digest(name, digests) != digest for name, digest in included.items()):
+        return None
+    return output
+
+
+def _write_cache(
+    cache_dir: Optional[pathlib.Path],
+    key: str,
+    output: bytes,
+    *,
+    include_dir: pathlib.Path,
+    digests: Dict[str, Optional[str]],
+) -> None:
+    """Cache output, preceded by a line with the hashes of the files it includes"""
+    if cache_dir is None:
+        return
+    included = {name: _file_digest(name, digests) for name in included_files(output, include_dir)}
+    write_atomic(cache_dir / f"{key}.i", json.dumps(included).encode() + b"\n" + output)
+
+
+def preprocess_variants(
+    filename: str,
+    raw_text: bytes,
+    variants: Sequence[Defines],
+    *,
+    cache_dir: Optional[pathlib.Path] = None,
+) -> List[Variant]:
+    """Preprocess a source with each set of defines, returning only the distinct variants
+
+    If cpp fails for a set of defines the source is used as it is for that variant."""
+    # Absolute, so the line markers name included files wherever the scan runs from
+    include_dir = pathlib.Path(filename).parent.resolve()
+    digests: Dict[str, Optional[str]] = {}
+    keys = [cache_key(raw_text, defines, include_dir) for defines in variants]
+    outputs = [_read_cache(cache_dir, key, digests) for key in keys]
+    missing = [i for i, output in enumerate(outputs) if output is None]
+
+    if missing:
+        with ThreadPoolExecutor(len(missing)) as executor:
+            futures = {
+                i: executor.submit(run_cpp, raw_text, variants[i], include_dir) for i in missing
+            }
+            for i, future in futures.items():
+                try:
+                    result = future.result()
+                except (OSError, subprocess.CalledProcessError) as exc:
+                    stderr = getattr(exc, "stderr", None)
+                    logging.warning(
+                        "Unable to preprocess %s with %s: %s",
+                        filename,
+                        ",".join(variants[i]) or "no defines",
+                        stderr.decode(errors="replace").strip() if stderr else exc,
+                    )
+                    continue
+                outputs[i] = result
+                _write_cache(cache_dir, keys[i], result, include_dir=include_dir, digests=digests)
+
+    distinct: dict[Tuple[bytes, Tuple[Optional[int], ...]], Variant] = {}
+    for defines, output in zip(variants, outputs):
+        lines: List[Optional[int]]
+        if output is None:
+            text, lines = raw_text, list(range(len(raw_text.splitlines())))
+        else:
+            text, lines = split_line_markers(output)
+        distinct.setdefault((text, tuple(lines)), Variant(",".join(defines), text, lines))
+
+    logging.debug("%d distinct variants of %s from %d", len(distinct), filename, len(variants))
+    return list(distinct.values())
@@ -0,0 +1,178 @@
+"""Cache lint results for individual subroutines and functions
+
+Diagnostics are stored relative to the first line of the routine that produced
+them, keyed by a hash of the routine's source. An edit to one routine in a
+large module therefore only requires the rules to be re-run on that routine.
+"""
+
+import hashlib
+import json
+import logging
+import pathlib
+from typing import Dict, List, Optional
+
+from tree_sitter import Node
+
+from castep_linter.__about__ import __version__
+from castep_linter.error_logging import ErrorLogger
+from castep_linter.error_logging.error_types import FortranMsgBase, fortran_error_from_record
+from castep_linter.fortran.fortran_raw_types import ROUTINE_TYPES
+from castep_linter.fortran.parser import FortranTree
+from castep_linter.storage import write_atomic
+from castep_linter.suppressions import SuppressionIndex
+from castep_linter.tests import CheckFunctionDict
+from castep_linter.tests.dispatch import DispatchTable
+
+CACHE_VERSION = 1
+
+PROGRAM_UNIT_TYPES = {"module", "submodule", "program"}
+
+# Diagnostics for a routine, relative to its first line
+RoutineResult = List[FortranMsgBase]
+
+
+def ruleset_fingerprint(test_dict: CheckFunctionDict, min_severity: int = 0) -> str:
+    """Identify a set of rules and message threshold so that results from
+    other rules are not reused"""
+    rules = sorted(
+        f"{node_type}:{test.__module__}.{test.__qualname__}"
+        for node_type, tests in test_dict.items()
+        for test in tests
+    )
+    ruleset = "\n".join([__version__, str(min_severity), *rules])
+    return hashlib.sha1(ruleset.encode()).hexdigest()  # noqa: S324
+
+
+def routine_key(
+    node: Node, raw_text: bytes, suppressions: Optional[SuppressionIndex] = None
+) -> str:
+    """Hash a routine together with the program units which contain it and
+    any suppression comments which apply to it"""
+    digest = hashlib.sha1()  # noqa: S324
+
+    parent = node.parent
+    while parent is not None:
+        if parent.type in PROGRAM_UNIT_TYPES and parent.named_children:
+            unit_statement = parent.named_children[0]
+            for unit_name in unit_statement.named_children:
+                if unit_name.type == "name" and unit_name.text is not None:
+                    digest.update(parent.type.encode() + b":" + unit_name.text.lower() + b"\0")
+        parent = parent.parent
+
+    digest.update(str(node.start_point[1]).encode() + b"\0")
+    digest.update(raw_text[node.start_byte : node.end_byte])
+    if suppressions:
+        # Suppressions may start outside the routine, so are not always in its text
+        digest.update(
+            b"\0" + suppressions.region_key(node.start_point[0], node.end_point[0]).encode()
+        )
+    return digest.hexdigest()
+
+
+class RoutineCache:
+    """On-disk cache of the diagnostics for each routine in a single source file"""
+
+    def __init__(self, cache_dir: pathlib.Path, filename: str, ruleset: str):
+        name = hashlib.sha1(filename.encode()).hexdigest()  # noqa: S324
+        self.file = cache_dir / f"{name}.json"
+        self.ruleset = ruleset
+        self.entries = self._load()
+        self.used: Dict[str, RoutineResult] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def _load(self) -> Dict[str, RoutineResult]:
+        """Read the cache file, discarding it if it was made by other rules"""
+        try:
+            with self.file.open("r", encoding="utf-8") as fd:
+                data = json.load(fd)
+        except (OSError, ValueError):
+            return {}
+
+        if data.get("version") != CACHE_VERSION or data.get("ruleset") != self.ruleset:
+            return {}
+
+        return {
+            key: [fortran_error_from_record(record) for record in msgs]
+            for key, msgs in data["routines"].items()
+        }
+
+    def get(self, key: str) -> Optional[RoutineResult]:
+        """Get the results for a routine if present"""
+        result = self.entries.get(key)
+        if result is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return result
+
+    def put(self, key: str, result: RoutineResult) -> None:
+        """Store the results for a routine seen in this scan"""
+        self.used[key] = result
+
+    def save(self) -> None:
+        """Write the routines seen in this scan back to disk"""
+        data = {
+            "version": CACHE_VERSION,
+            "ruleset": self.ruleset,
+            "routines": {key: [msg.to_record() for msg in msgs] for key, msgs in self.used.items()},
+        }
+
+        write_atomic(self.file, json.dumps(data).encode())
+
+
+def run_tests_cached(
+    fort_tree: FortranTree,
+    test_dict: CheckFunctionDict,
+    filename: str,
+    cache: RoutineCache,
+    min_severity: int = 0,
+    *,
+    suppressions: Optional[SuppressionIndex] = None,
+    max_errors: Optional[int] = None,
+) -> ErrorLogger:
+    """Run all available tests on the supplied source code, reusing results
+    from the cache for any routine which has not changed"""
+    error_log = ErrorLogger(
+        filename, min_severity=min_severity, suppressions=suppressions, max_errors=max_errors
+    )
+    routine_table = DispatchTable(test_dict)
+    # Batched tests would cover the routines as well, so run everything per node
+    outer_table = DispatchTable(test_dict, batched=False)
+
+    stack = [fort_tree.tree.root_node]
+    while stack:
+        node = stack.pop()
+
+        if node.is_named and node.type in ROUTINE_TYPES:
+            key = routine_key(node, fort_tree.raw_text, suppressions)
+            start_line = node.start_point[0]
+
+            result = cache.get(key)
+            if result is None:
+                first_err = len(error_log.errors)
+                for sub_node in fort_tree.walk_raw(node):
+                    routine_table.run_tests(sub_node, error_log)
+                    if max_errors is not None and error_log.full:
+                        break
+                routine_table.run_batch_tests(fort_tree, node, error_log, first_err)
+                result = [err.shifted(-start_line) for err in error_log.errors[first_err:]]
+            else:
+                error_log.errors.extend(err.shifted(start_line) for err in result)
+                error_log.truncate()
+
+            # Results cut short by reaching max_errors are incomplete, so not cached
+            if max_errors is not None and error_log.full:
+                error_log.truncated = True
+                break
+            cache.put(key, result)
+            continue
+
+        outer_table.run_tests(node, error_log)
+        if max_errors is not None and error_log.full:
+            error_log.truncated = True
+            break
+        stack.extend(reversed(node.children))
+
+    logging.debug("%s: %d routines cached, %d rescanned", filename, cache.hits, cache.misses)
+    return error_log
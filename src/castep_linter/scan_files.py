@@ -2,46 +2,184 @@
 
 import argparse
 import functools
+import heapq
 import logging
 import pathlib
+import re
 import sys
-from multiprocessing import Pool
+import time
+from collections import Counter
+from typing import TYPE_CHECKING, Callable, Iterable, Iterator, Optional
 
-from rich.console import Console
-
-from castep_linter import error_logging
+from castep_linter import archive, error_logging, storage, symbol_index
+from castep_linter.__about__ import __version__
 from castep_linter.error_logging.error_types import PrintStyle
-from castep_linter.error_logging.json_writer import write_codeclimate, write_jenkins
-from castep_linter.error_logging.xml_writer import write_xml
-from castep_linter.fortran import parser
-from castep_linter.tests import CheckFunction, test_list
+from castep_linter.fortran import parser, splitter
+from castep_linter.prefetch import Prefetcher
+from castep_linter.suppressions import SuppressionIndex
+from castep_linter.tests import (
+    RULE_TYPES,
+    CheckFunction,
+    LexicalCheckFunction,
+    lexical_test_list,
+    prefilter,
+    select_tests,
+    test_list,
+)
+from castep_linter.tests.dispatch import DispatchTable
+from castep_linter.tests.rule_info import get_rule_type
+
+# Report writers, rich and multiprocessing are slow to import, so they are only
+# imported where they are used to keep startup fast for single file scans
+if TYPE_CHECKING:
+    from rich.console import Console
+
+    from castep_linter import statistics
+    from castep_linter.watch import FileDelta
+
+CPP_DEFINE = re.compile(r"[A-Za-z_]\w*(=.*)?$")
 
 # done - complex(var) vs complex(var,dp) or complex(var, kind=dp)
 # done - allocate without stat and stat not checked. deallocate?
 # done - integer_dp etc
 # real with trailing . not .0 or .0_dp?
 # io_allocate_abort with wrong subname
-# tabs & DOS line endings, whitespace, comments?
+# done - tabs & DOS line endings, whitespace
+# comments?
+
+
+@functools.lru_cache(maxsize=None)
+def get_console() -> "Console":
+    """Get the rich console used for styled output"""
+    from rich.console import Console
+
+    return Console(soft_wrap=True)
+
+
+class SerialPool:
+    """Stand-in for a multiprocessing pool which runs everything in this process,
+    avoiding the cost of starting a worker when only one is wanted"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_exc):
+        pass
+
+    @staticmethod
+    def imap(func: Callable, iterable: Iterable) -> Iterator:
+        """Lazily apply a function to each item in order"""
+        return map(func, iterable)
+
+    imap_unordered = imap
+
+    @staticmethod
+    def apply_async(func: Callable, args: tuple, callback: Callable, error_callback: Callable):
+        """Run a function immediately, passing the outcome to the callbacks"""
+        try:
+            result = func(*args)
+        except Exception as exc:
+            error_callback(exc)
+        else:
+            callback(result)
 
-CONSOLE = Console(soft_wrap=True)
+
+def worker_pool(processes: int):
+    """Get a pool of worker processes, or a serial pool if only one is needed"""
+    if processes <= 1:
+        return SerialPool()
+
+    from multiprocessing import Pool
+
+    return Pool(processes)
 
 
 def run_tests_on_code(
-    fort_tree: parser.FortranTree, test_dict: dict[str, list[CheckFunction]], filename: str
+    fort_tree: parser.FortranTree,
+    test_dict: dict[str, list[CheckFunction]],
+    filename: str,
+    min_severity: int = 0,
+    *,
+    suppressions: Optional[SuppressionIndex] = None,
+    max_errors: Optional[int] = None,
 ) -> error_logging.ErrorLogger:
-    """Run all available tests on the supplied source code"""
-    error_log = error_logging.ErrorLogger(filename)
+    """Run all available tests on the supplied source code, stopping early
+    if more than max_errors messages are found"""
+    error_log = error_logging.ErrorLogger(
+        filename, min_severity=min_severity, suppressions=suppressions, max_errors=max_errors
+    )
+    dispatch_table = DispatchTable(test_dict)
 
-    for node in fort_tree.walk():
-        # Have to check for is_named here as we want the statements,
-        # not literal words like subroutine
-        if node.type in test_dict:
-            for test in test_dict[node.type]:
-                test(node, error_log)
+    for node in fort_tree.walk_raw():
+        dispatch_table.run_tests(node, error_log)
+        if max_errors is not None and error_log.full:
+            error_log.truncated = True
+            break
+
+    # Batched tests can still find messages before the point the walk stopped at
+    dispatch_table.run_batch_tests(fort_tree, fort_tree.tree.root_node, error_log)
 
     return error_log
 
 
+def run_lexical_tests(
+    raw_text: bytes, lexical_tests: list[LexicalCheckFunction], error_log: error_logging.ErrorLogger
+) -> None:
+    """Run tests which work directly on the source bytes, merging their messages in
+    source order with those already logged"""
+    for test in lexical_tests:
+        # Logged separately, so the messages already logged do not count towards its limit
+        lexical_log = error_logging.ErrorLogger(
+            error_log.filename,
+            min_severity=error_log.min_severity,
+            suppressions=error_log.suppressions,
+            rule_type=get_rule_type(test),
+            max_errors=error_log.max_errors,
+        )
+        test(raw_text, lexical_log)
+        if not lexical_log.errors:
+            continue
+
+        error_log.errors[:] = heapq.merge(
+            error_log.errors, lexical_log.errors, key=lambda err: err.start_point
+        )
+        error_log.truncated |= lexical_log.truncated
+        error_log.truncate()
+
+
+def write_plain(text: str) -> None:
+    """Write text to stdout in a single call, bypassing rich"""
+    sys.stdout.flush()
+    out = getattr(sys.stdout, "buffer", None)
+    if out is None:
+        sys.stdout.write(text)
+        return
+    out.write(text.encode(sys.stdout.encoding or "utf-8", errors="replace"))
+    out.flush()
+
+
+def rule_types(arg: str) -> set[str]:
+    """Parse a comma separated list of rule types"""
+    types = {rule_type.strip().upper() for rule_type in arg.split(",") if rule_type.strip()}
+    unknown = types - set(RULE_TYPES)
+    if unknown:
+        err = (
+            f"Unknown rule types {', '.join(sorted(unknown))}. Choose from {', '.join(RULE_TYPES)}"
+        )
+        raise argparse.ArgumentTypeError(err)
+    return types
+
+
+def cpp_defines(arg: str) -> tuple[str, ...]:
+    """Parse a comma separated list of preprocessor defines, eg MPI,DEBUG=1"""
+    defines = tuple(define.strip() for define in arg.split(",") if define.strip())
+    invalid = [define for define in defines if not CPP_DEFINE.match(define)]
+    if invalid:
+        err = f"Invalid preprocessor defines {', '.join(invalid)}. Use NAME or NAME=VALUE"
+        raise argparse.ArgumentTypeError(err)
+    return defines
+
+
 def path(arg: str) -> pathlib.Path:
     """Check a file exists and if so, return a path object"""
     my_file = pathlib.Path(arg)
@@ -51,6 +189,46 @@ def path(arg: str) -> pathlib.Path:
     return my_file
 
 
+def directory(arg: str) -> pathlib.Path:
+    """Check a directory exists and if so, return a path object"""
+    my_dir = pathlib.Path(arg)
+    if not my_dir.is_dir():
+        err = f"The directory {arg} does not exist!"
+        raise argparse.ArgumentTypeError(err)
+    return my_dir
+
+
+def reject_options(
+    arg_parser: argparse.ArgumentParser, args: argparse.Namespace, names: list[str], mode: str
+) -> None:
+    """Exit with a usage error if any of the named args are used with a mode"""
+    used = [
+        name if name == "file" else f"--{name.replace('_', '-')}"
+        for name in names
+        if getattr(args, name)
+    ]
+    if used:
+        arg_parser.error(f"{', '.join(used)} cannot be used with {mode}")
+
+
+# Args for reports on a complete scan, which make no sense when streaming results
+STREAMING_UNSUPPORTED = [
+    "file",
+    "xml",
+    "json",
+    "ndjson",
+    "codeclimate",
+    "baseline",
+    "journal",
+    "statistics",
+    "statistics_json",
+    "time_budget",
+    "fail_fast",
+    "print_tree",
+    "changed",
+]
+
+
 def parse_args():
     """Parse the command line args for a message print level and a list of filenames"""
     arg_parser = argparse.ArgumentParser(prog="castep-linter", description="Code linter for CASTEP")
@@ -76,74 +254,877 @@ def parse_args():
         "-j", "--json", type=pathlib.Path, help="File for Jenkins json output if required"
     )
     arg_parser.add_argument(
-        "-c", "--codeclimate", type=pathlib.Path, help="File for CodeClimate jason output if required"
+        "-c",
+        "--codeclimate",
+        type=pathlib.Path,
+        help="File for CodeClimate jason output if required",
+    )
+    arg_parser.add_argument(
+        "--ndjson",
+        type=pathlib.Path,
+        help="File to append one json record per issue to as each file is scanned",
     )
     arg_parser.add_argument(
         "-p", "--parallel", type=int, default=1, help="How many threads to use for scanning"
     )
+    arg_parser.add_argument(
+        "-r",
+        "--rules",
+        type=rule_types,
+        default=None,
+        help=f"Comma separated list of rule types to run ({','.join(RULE_TYPES)})",
+    )
+    arg_parser.add_argument(
+        "--split-size",
+        type=int,
+        default=1 << 20,
+        help="Files of at least this many bytes are split into pieces and scanned in parallel",
+    )
+    arg_parser.add_argument(
+        "--index",
+        type=pathlib.Path,
+        default=None,
+        metavar="FILE",
+        help="Project symbol index for rules which look across files and for --changed, updated"
+        " for the files scanned before scanning them",
+    )
+    arg_parser.add_argument(
+        "--changed",
+        type=pathlib.Path,
+        action="append",
+        default=None,
+        metavar="FILE",
+        help="Only scan the files which use modules from FILE, directly or indirectly, and FILE"
+        " itself. Can be given more than once and needs --index",
+    )
+    arg_parser.add_argument(
+        "--cpp-variant",
+        type=cpp_defines,
+        action="append",
+        dest="cpp_variants",
+        default=None,
+        metavar="DEFINES",
+        help="Run the C preprocessor with these comma separated defines, eg MPI,DEBUG=1, before"
+        ' scanning files with directives. Give it once per configuration to scan, with "" for'
+        " none. Issues are reported once against the original lines",
+    )
+    arg_parser.add_argument(
+        "--prefetch",
+        type=int,
+        default=8,
+        metavar="N",
+        help="Read up to N files ahead of those being scanned in the background, 0 to disable",
+    )
+    arg_parser.add_argument(
+        "--cache",
+        type=pathlib.Path,
+        default=None,
+        help="Directory in which to cache results for unchanged subroutines and functions",
+    )
+    arg_parser.add_argument(
+        "--baseline",
+        type=path,
+        default=None,
+        help="CodeClimate report of known issues which should not be reported again",
+    )
+    arg_parser.add_argument(
+        "--time-budget",
+        type=float,
+        default=None,
+        metavar="SECONDS",
+        help="Scan recently changed files first and start no new files after this long",
+    )
+    arg_parser.add_argument(
+        "--fail-fast",
+        action="store_true",
+        help="Stop as soon as any file has an issue at or above the level,"
+        " reporting at most one issue per file",
+    )
+    arg_parser.add_argument(
+        "--max-diagnostics",
+        type=int,
+        default=None,
+        metavar="N",
+        help="Stop collecting issues for a file after the first N",
+    )
+    arg_parser.add_argument(
+        "--statistics",
+        action="store_true",
+        help="Only report the number of issues of each type and severity in each directory",
+    )
+    arg_parser.add_argument(
+        "--statistics-json",
+        type=pathlib.Path,
+        default=None,
+        metavar="FILE",
+        help="File for json output of the statistics, implies --statistics",
+    )
+    arg_parser.add_argument(
+        "--journal",
+        type=pathlib.Path,
+        default=None,
+        help="File to record the results for each file in as soon as it has been scanned",
+    )
+    arg_parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Reuse the results in the journal for files which have not changed",
+    )
+    arg_parser.add_argument(
+        "--stdin-batch",
+        action="store_true",
+        help="Lint '<length> <path>\\n<contents>' documents read from stdin until it is closed,"
+        " writing the issues in each to stdout as json lines",
+    )
+    arg_parser.add_argument(
+        "--watch",
+        type=directory,
+        default=None,
+        metavar="DIR",
+        help="Lint the Fortran files below a directory, then relint them as they change,"
+        " printing the issues introduced and fixed",
+    )
+    arg_parser.add_argument("--version", action="version", version=f"%(prog)s {__version__}")
     arg_parser.add_argument("-q", "--quiet", action="store_true", help="Do not write to console")
     arg_parser.add_argument("-d", "--debug", action="store_true", help="Turn on debug output")
     arg_parser.add_argument(
         "--print-tree", action="store_true", help="Print the parsed source tree"
     )
-    arg_parser.add_argument("file", nargs="+", type=path, help="Files to scan")
-    return arg_parser.parse_args()
+    arg_parser.add_argument(
+        "file", nargs="*", type=path, help="Files or .tar.gz/.tar.xz/.zip archives to scan"
+    )
+    args = arg_parser.parse_args()
+    if args.stdin_batch:
+        reject_options(arg_parser, args, [*STREAMING_UNSUPPORTED, "watch"], "--stdin-batch")
+    elif args.watch:
+        reject_options(arg_parser, args, STREAMING_UNSUPPORTED, "--watch")
+    elif not args.file:
+        arg_parser.error("the following arguments are required: file")
+    if args.changed and args.index is None:
+        arg_parser.error("--changed requires --index")
+    if args.resume and args.journal is None:
+        arg_parser.error("--resume requires --journal")
+    if args.statistics_json is not None:
+        args.statistics = True
+    if args.statistics:
+        # These all need the individual messages
+        unsupported = [
+            "xml",
+            "json",
+            "ndjson",
+            "codeclimate",
+            "baseline",
+            "journal",
+            "fail_fast",
+            "time_budget",
+        ]
+        reject_options(arg_parser, args, unsupported, "--statistics")
+    # Only pass/fail matters, so there is no need to look past the first issue
+    if args.fail_fast and args.max_diagnostics is None:
+        args.max_diagnostics = 1
+    return args
+
+
+def scan_file(
+    file: pathlib.Path, args: argparse.Namespace, piece: Optional[splitter.Piece] = None
+) -> error_logging.ErrorLogger:
+    """Scan a source file on disk, or only a piece of it"""
+    with file.open("rb") as fd:
+        raw_text = fd.read()
+    error_log = scan_source(str(file), raw_text, args, piece)
+    # Keep the text for printing context and fingerprints, rather than reading it again
+    if error_log.errors:
+        error_log.source = raw_text
+    if args.journal:
+        error_log.digest = storage.source_digest(raw_text)
+    return error_log
+
+
+def scan_task(
+    task: tuple[pathlib.Path, Optional[splitter.Piece]], args: argparse.Namespace
+) -> error_logging.ErrorLogger:
+    """Scan a file or piece of a file in a worker"""
+    file, piece = task
+    return scan_file(file, args, piece)
+
+
+def file_tasks(
+    file: pathlib.Path, args: argparse.Namespace
+) -> list[tuple[pathlib.Path, Optional[splitter.Piece]]]:
+    """Get the tasks to scan a file, splitting very large files so that their
+    routines are scanned concurrently"""
+    # Preprocessed variants of a file are scanned whole
+    if args.parallel > 1 and not args.cpp_variants and file.stat().st_size >= args.split_size:
+        return [(file, piece) for piece in split_file(file, args.parallel)]
+    return [(file, None)]
+
+
+def split_file(file: pathlib.Path, num_pieces: int) -> list[Optional[splitter.Piece]]:
+    """Split a large file into pieces at routine boundaries to be scanned concurrently"""
+    pieces: list[Optional[splitter.Piece]] = []
+    pieces.extend(splitter.split_tree(parser.FortranTree.from_file(file), num_pieces))
+    logging.debug("Split %s into %d pieces", file, len(pieces))
+    return pieces or [None]
+
+
+def merge_pieces(error_logs: list[error_logging.ErrorLogger]) -> list[error_logging.ErrorLogger]:
+    """Stitch together the results from pieces of the same file"""
+    merged: dict[str, error_logging.ErrorLogger] = {}
+    split_files = set()
+    for error_log in error_logs:
+        if error_log.filename in merged:
+            merged[error_log.filename].errors.extend(error_log.errors)
+            merged[error_log.filename].truncated |= error_log.truncated
+            split_files.add(error_log.filename)
+        else:
+            merged[error_log.filename] = error_log
+
+    for filename in split_files:
+        merged[filename].errors.sort(key=lambda err: err.start_point)
+        merged[filename].truncate()
+
+    return list(merged.values())
+
+
+def completed_files(
+    error_logs: Iterable[error_logging.ErrorLogger],
+    tasks: list[tuple[pathlib.Path, Optional[splitter.Piece]]],
+) -> Iterator[error_logging.ErrorLogger]:
+    """Merge the results for each file as soon as all of its pieces have been scanned"""
+    expected = Counter(str(file) for file, _ in tasks)
+    pieces: dict[str, list[error_logging.ErrorLogger]] = {}
+    for error_log in error_logs:
+        file_pieces = pieces.setdefault(error_log.filename, [])
+        file_pieces.append(error_log)
+        if len(file_pieces) == expected[error_log.filename]:
+            yield from merge_pieces(pieces.pop(error_log.filename))
+
+
+def scan_task_statistics(
+    task: tuple[pathlib.Path, Optional[splitter.Piece]], args: argparse.Namespace
+) -> tuple[str, "statistics.CountVector"]:
+    """Scan a file or piece of a file in a worker, returning only the issue counts"""
+    from castep_linter import statistics
+
+    error_log = scan_task(task, args)
+    return error_log.filename, statistics.count_vector(error_log)
+
+
+def scan_member_statistics(
+    member: tuple[str, bytes], args: argparse.Namespace
+) -> tuple[str, "statistics.CountVector"]:
+    """Scan a source file read from an archive, returning only the issue counts"""
+    from castep_linter import statistics
+
+    name, raw_text = member
+    return name, statistics.count_vector(scan_source(name, raw_text, args))
+
+
+def scan_member(member: tuple[str, bytes], args: argparse.Namespace) -> error_logging.ErrorLogger:
+    """Scan a source file read from an archive, keeping the text for context printing"""
+    name, raw_text = member
+    error_log = scan_source(name, raw_text, args)
+    error_log.source = raw_text
+    return error_log
+
+
+def scan_variants(
+    filename: str, raw_text: bytes, args: argparse.Namespace
+) -> error_logging.ErrorLogger:
+    """Scan each distinct variant of a source produced by the C preprocessor, reporting
+    the issues from all of them against the original lines"""
+    from castep_linter import preprocess
+
+    min_severity = error_logging.ERROR_SEVERITY[args.level]
+    _, lexical_tests = select_tests(args.rules, min_severity)
+    variants = preprocess.preprocess_variants(
+        filename,
+        raw_text,
+        args.cpp_variants,
+        cache_dir=None if args.cache is None else args.cache / "cpp",
+    )
+
+    error_log = error_logging.ErrorLogger(
+        filename,
+        min_severity=min_severity,
+        suppressions=SuppressionIndex.from_source(raw_text),
+        max_errors=args.max_diagnostics,
+    )
+    # Code outside any #ifdef gives the same issues in every variant
+    seen = set()
+    for variant in variants:
+        variant_log = scan_source(filename, variant.text, args, variant=variant.name)
+        for err in variant.map_errors(variant_log.errors):
+            key = (err.ERROR_TYPE, err.message, err.start_point, err.end_point)
+            if key not in seen:
+                seen.add(key)
+                error_log.errors.append(err)
+    error_log.errors.sort(key=lambda err: err.start_point)
+    error_log.truncate()
+
+    # The text of the original file, not the variants, is what lexical tests check
+    run_lexical_tests(raw_text, lexical_tests, error_log)
+    return error_log
 
 
-def scan_file(file: pathlib.Path, args: argparse.Namespace) -> error_logging.ErrorLogger:
-    # Parse the source file
-    fortan_tree = parser.FortranTree.from_file(file)
+def scan_source(
+    filename: str,
+    raw_text: bytes,
+    args: argparse.Namespace,
+    piece: Optional[splitter.Piece] = None,
+    *,
+    variant: Optional[str] = None,
+) -> error_logging.ErrorLogger:
+    """Parse and scan some source code, optionally restricted to a piece of it, or
+    as the preprocessed variant of a file with some defines"""
+    if args.cpp_variants and piece is None and variant is None:
+        from castep_linter import preprocess
+
+        if preprocess.has_directives(raw_text):
+            return scan_variants(filename, raw_text, args)
+
+    min_severity = error_logging.ERROR_SEVERITY[args.level]
+    selected_tests, lexical_tests = select_tests(args.rules, min_severity)
+    symbol_index.activate(args.index)
+    tests = prefilter.active_tests(raw_text, selected_tests)
+    suppressions = SuppressionIndex.from_source(raw_text)
+
+    # Lexical tests only need to be run once per file, not per piece or variant
+    if (piece is not None and piece.index > 0) or variant is not None:
+        lexical_tests = []
+
+    # Skip parsing entirely if there are no tests which need it
+    if not tests and not args.print_tree:
+        error_log = error_logging.ErrorLogger(
+            filename,
+            min_severity=min_severity,
+            suppressions=suppressions,
+            max_errors=args.max_diagnostics,
+        )
+        run_lexical_tests(raw_text, lexical_tests, error_log)
+        return error_log
+
+    if piece is None:
+        fortan_tree = parser.FortranTree(raw_text)
+    else:
+        fortan_tree = parser.FortranTree(raw_text, included_ranges=piece.included_ranges())
 
     # Print for development
     if args.print_tree:
-        fortan_tree.display(CONSOLE.print)
+        fortan_tree.display(get_console().print)
 
     # Actually run the tests
     try:
-        error_log = run_tests_on_code(fortan_tree, test_list, str(file))
+        if args.cache:
+            cache_name = filename if piece is None else f"{filename}#{piece.index}"
+            if variant is not None:
+                cache_name = f"{filename}#cpp:{variant}"
+            from castep_linter import routine_cache
+
+            cache = routine_cache.RoutineCache(
+                args.cache,
+                cache_name,
+                routine_cache.ruleset_fingerprint(selected_tests, min_severity),
+            )
+            error_log = routine_cache.run_tests_cached(
+                fortan_tree,
+                tests,
+                filename,
+                cache,
+                min_severity,
+                suppressions=suppressions,
+                max_errors=args.max_diagnostics,
+            )
+            cache.save()
+        else:
+            error_log = run_tests_on_code(
+                fortan_tree,
+                tests,
+                filename,
+                min_severity,
+                suppressions=suppressions,
+                max_errors=args.max_diagnostics,
+            )
     except UnicodeDecodeError:
-        logging.error("Failed to properly decode %s", file)
+        logging.error("Failed to properly decode %s", filename)
         raise
     except Exception:
-        logging.error("Failed to properly parse %s", file)
+        logging.error("Failed to properly parse %s", filename)
         raise
 
+    run_lexical_tests(raw_text, lexical_tests, error_log)
     return error_log
 
 
+def parse_history_args(argv: list[str]):
+    """Parse the command line args for the history subcommand"""
+    arg_parser = argparse.ArgumentParser(
+        prog="castep-linter history",
+        description="Summarise lint results over a range of git revisions",
+    )
+    arg_parser.add_argument("revisions", nargs="+", help="Revisions or REV1..REV2 ranges to scan")
+    arg_parser.add_argument(
+        "-C", "--repo", type=pathlib.Path, default=None, help="Path to the git repository"
+    )
+    arg_parser.add_argument(
+        "-p", "--parallel", type=int, default=1, help="How many threads to use for scanning"
+    )
+    arg_parser.add_argument("-d", "--debug", action="store_true", help="Turn on debug output")
+    return arg_parser.parse_args(argv)
+
+
+def scan_blob(blob: tuple[str, bytes]) -> tuple[str, dict[str, int]]:
+    """Scan the contents of a git blob and count the issues found"""
+    sha, raw_text = blob
+    tests = prefilter.active_tests(raw_text, test_list)
+    suppressions = SuppressionIndex.from_source(raw_text)
+    if tests:
+        error_log = run_tests_on_code(
+            parser.FortranTree(raw_text), tests, sha, suppressions=suppressions
+        )
+    else:
+        error_log = error_logging.ErrorLogger(sha, suppressions=suppressions)
+    run_lexical_tests(raw_text, lexical_test_list, error_log)
+    return sha, error_log.count_errors()
+
+
+def history_main(argv: list[str]) -> None:
+    """Entry point for scanning a range of git history"""
+    from rich.table import Table
+
+    from castep_linter import git_history
+
+    args = parse_history_args(argv)
+
+    if args.debug:
+        logging.basicConfig(level=logging.DEBUG)
+
+    try:
+        # Single revisions keep the name they were given, those from ranges are abbreviated
+        revisions = [
+            (commit[:12] if ".." in rev else rev, commit)
+            for rev in args.revisions
+            for commit in git_history.expand_revisions([rev], args.repo)
+        ]
+        trees = {
+            commit: git_history.list_fortran_blobs(commit, args.repo) for _, commit in revisions
+        }
+
+        # Each blob only needs scanning once, however many revisions contain it
+        unique_blobs = sorted({sha for tree in trees.values() for sha in tree.values()})
+        logging.debug("Scanning %d unique blobs in %d revisions", len(unique_blobs), len(trees))
+
+        with worker_pool(args.parallel) as p:
+            blob_counts = dict(
+                p.imap_unordered(scan_blob, git_history.read_blobs(unique_blobs, args.repo))
+            )
+    except git_history.GitError as exc:
+        get_console().print(f"[red]{exc}[/red]")
+        sys.exit(2)
+
+    table = Table(title="Lint history")
+    table.add_column("Revision")
+    table.add_column("Files", justify="right")
+    for err_str in error_logging.ERROR_SEVERITY:
+        table.add_column(err_str, justify="right")
+
+    for label, commit in revisions:
+        totals = dict.fromkeys(error_logging.ERROR_SEVERITY, 0)
+        for sha in trees[commit].values():
+            for err_str, count in blob_counts[sha].items():
+                totals[err_str] += count
+        table.add_row(label, str(len(trees[commit])), *(str(n) for n in totals.values()))
+
+    get_console().print(table)
+    sys.exit(0)
+
+
+def parse_diff_args(argv: list[str]):
+    """Parse the command line args for the diff subcommand"""
+    arg_parser = argparse.ArgumentParser(
+        prog="castep-linter diff",
+        description="Show the issues introduced and fixed between two CodeClimate reports",
+    )
+    arg_parser.add_argument("old", type=path, help="Report from before the change")
+    arg_parser.add_argument("new", type=path, help="Report from after the change")
+    arg_parser.add_argument(
+        "--fixed", action="store_true", help="Also list the issues which have been fixed"
+    )
+    return arg_parser.parse_args(argv)
+
+
+def diff_main(argv: list[str]) -> None:
+    """Entry point for comparing two reports"""
+    from castep_linter.error_logging import baseline
+
+    args = parse_diff_args(argv)
+
+    diff = baseline.diff_reports(baseline.load_report(args.old), baseline.load_report(args.new))
+
+    shown = [("+", "red", diff.introduced)]
+    if args.fixed:
+        shown.append(("-", "green", diff.fixed))
+
+    for sign, style, issues in shown:
+        for issue in issues:
+            location = issue["location"]
+            get_console().print(
+                f"{sign} {location['path']}:{location['lines']['begin'] + 1}:"
+                f" {issue['check_name']}: {issue['description']}",
+                style=style,
+                markup=False,
+                highlight=False,
+            )
+
+    get_console().print(f"{len(diff.introduced)} issues introduced, {len(diff.fixed)} fixed")
+    sys.exit(1 if diff.introduced else 0)
+
+
+def stdin_batch_main(args: argparse.Namespace) -> None:
+    """Lint documents from stdin, writing out the results for each as it is finished"""
+    from castep_linter.error_logging.ndjson_writer import NdjsonWriter
+    from castep_linter.linter import Linter
+    from castep_linter.stdin_batch import lint_documents, read_documents
+
+    linter = Linter(
+        args.rules,
+        args.level,
+        max_diagnostics=args.max_diagnostics,
+        cache=args.cache,
+        index=args.index,
+        cpp_variants=args.cpp_variants,
+    )
+    writer = NdjsonWriter(sys.stdout, error_logging.ERROR_SEVERITY[args.level])
+    try:
+        count = lint_documents(linter, read_documents(sys.stdin.buffer), writer)
+    except ValueError as exc:
+        logging.error("%s", exc)
+        sys.exit(2)
+    logging.debug("Linted %d documents from stdin", count)
+    sys.exit(0)
+
+
+def update_index(args: argparse.Namespace, files: list[pathlib.Path]) -> list[pathlib.Path]:
+    """Bring the symbol index up to date for the files about to be scanned, returning
+    only those which depend on the --changed files if any were given"""
+    index = symbol_index.SymbolIndex.load(args.index)
+    changed = [file.resolve() for file in args.changed or []]
+    # Modules deleted from the changed files still affect the files which used them
+    old_modules = index.modules_defined(changed)
+
+    to_index = dict.fromkeys([*files, *(file for file in changed if file.exists())])
+    with worker_pool(args.parallel) as p:
+        if index.update(to_index, p.imap_unordered):
+            index.save(args.index)
+
+    if args.changed is None:
+        return files
+    affected = index.affected(changed, old_modules)
+    files = [file for file in files if str(file.resolve()) in affected]
+    logging.debug("%d files affected by %d changed files", len(files), len(changed))
+    return files
+
+
+def print_delta(delta: "FileDelta") -> None:
+    """Print the issues introduced and fixed in a file, like diff"""
+    for sign, style, issues in [("+", "red", delta.introduced), ("-", "green", delta.fixed)]:
+        for err in issues:
+            get_console().print(
+                f"{sign} {delta.filename}:{err.start_point[0] + 1}:{err.start_point[1] + 1}:"
+                f" {err.ERROR_TYPE}: {err.message}",
+                style=style,
+                markup=False,
+                highlight=False,
+            )
+
+
+def watch_main(args: argparse.Namespace) -> None:
+    """Relint files as they change, printing the changes in their issues"""
+    from castep_linter.linter import Linter
+    from castep_linter.watch import Watcher
+
+    executor = None
+    if args.parallel > 1:
+        from concurrent.futures import ProcessPoolExecutor
+
+        # Kept for the whole session, so the workers stay warm
+        executor = ProcessPoolExecutor(args.parallel)
+
+    linter = Linter(
+        args.rules,
+        args.level,
+        max_diagnostics=args.max_diagnostics,
+        cache=args.cache,
+        index=args.index,
+        cpp_variants=args.cpp_variants,
+        executor=executor,
+    )
+    watcher = Watcher(linter, args.watch)
+    try:
+        for delta in watcher.start():
+            print_delta(delta)
+        get_console().print(
+            f"Watching {len(watcher.files)} files in {args.watch} for changes", style="blue"
+        )
+        while True:
+            changed, removed = watcher.wait_for_changes()
+            logging.debug("%d files changed, %d removed", len(changed), len(removed))
+            for delta in watcher.relint(changed, removed):
+                print_delta(delta)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+    sys.exit(0)
+
+
+def statistics_main(
+    args: argparse.Namespace, files: list[pathlib.Path], archives: list[pathlib.Path]
+) -> None:
+    """Scan files and report only the number of issues of each type in each directory"""
+    from castep_linter import statistics
+
+    tasks = [task for file in files for task in file_tasks(file, args)]
+    file_counts: dict[str, statistics.CountVector] = {}
+
+    def _add(filename: str, counts: statistics.CountVector) -> None:
+        # Pieces of a split file are added together before rolling up
+        if filename in file_counts:
+            statistics.add_vectors(file_counts[filename], counts)
+        else:
+            file_counts[filename] = counts
+
+    with worker_pool(args.parallel) as p:
+        scanner = functools.partial(scan_task_statistics, args=args)
+        for filename, counts in p.imap_unordered(scanner, tasks):
+            _add(filename, counts)
+
+        member_scanner = functools.partial(scan_member_statistics, args=args)
+        for archive_file in archives:
+            members = archive.iter_named_members(archive_file)
+            for name, counts in p.imap_unordered(member_scanner, members):
+                _add(name, counts)
+
+    summaries = statistics.rollup(file_counts.items())
+    if not args.quiet:
+        statistics.print_statistics(get_console(), summaries)
+    if args.statistics_json:
+        statistics.write_statistics(args.statistics_json, summaries)
+
+    # Exit with an error code if there were any errors, as for a full scan
+    severity = error_logging.ERROR_SEVERITY[args.level]
+    totals = statistics.DirectorySummary()
+    for counts in file_counts.values():
+        statistics.add_vectors(totals.counts, counts)
+    failed = any(
+        count
+        for level, count in totals.by_severity().items()
+        if error_logging.ERROR_SEVERITY[level] >= severity
+    )
+    sys.exit(1 if failed else 0)
+
+
 def main() -> None:
     """Main entry point for the CASTEP linter"""
+    if sys.argv[1:2] == ["history"]:
+        history_main(sys.argv[2:])
+    if sys.argv[1:2] == ["diff"]:
+        diff_main(sys.argv[2:])
+
+    start_time = time.monotonic()
     args = parse_args()
 
     if args.debug:
         logging.basicConfig(level=logging.DEBUG)
 
-    scanner = functools.partial(scan_file, args=args)
+    if args.stdin_batch:
+        stdin_batch_main(args)
+    if args.watch:
+        watch_main(args)
+
+    scanner = functools.partial(scan_task, args=args)
+    member_scanner = functools.partial(scan_member, args=args)
+
+    files = list(dict.fromkeys(file for file in args.file if not archive.is_archive(file)))
+    archives = [file for file in args.file if archive.is_archive(file)]
+
+    if args.index is not None:
+        files = update_index(args, files)
 
-    with Pool(args.parallel) as p:
-        error_list = p.map(scanner, args.file)
+    if args.statistics:
+        statistics_main(args, files, archives)
+
+    scan_journal = None
+    if args.journal:
+        settings = {
+            "linter": __version__,
+            "level": args.level,
+            "rules": sorted(args.rules) if args.rules else None,
+            "max_diagnostics": args.max_diagnostics,
+            "cpp_variants": [",".join(v) for v in args.cpp_variants] if args.cpp_variants else None,
+        }
+        from castep_linter import journal
+
+        scan_journal = journal.Journal(args.journal, settings, resume=args.resume)
+
+    if args.baseline:
+        from castep_linter.error_logging import baseline
+
+    if args.time_budget is not None:
+        from castep_linter import budget
+
+        had_errors: set[str] = set()
+        if scan_journal is not None:
+            had_errors.update(
+                name for name, (_, log) in scan_journal.entries.items() if log.has_errors
+            )
+        if args.baseline:
+            had_errors.update(
+                issue["location"]["path"] for issue in baseline.load_report(args.baseline).values()
+            )
+        files = budget.prioritise(files, had_errors)
+
+    known_issues = baseline.load_fingerprints(args.baseline) if args.baseline else None
+    num_known = 0
+    ndjson = None
+    if args.ndjson:
+        from castep_linter.error_logging.ndjson_writer import NdjsonWriter
+
+        ndjson = NdjsonWriter(args.ndjson, error_logging.ERROR_SEVERITY[args.level])
+
+    def _finished(error_log: error_logging.ErrorLogger) -> bool:
+        """Filter and stream out the results for a file, returning whether it failed"""
+        nonlocal num_known
+        # Issues already in the baseline are dropped before they are reported
+        if known_issues is not None:
+            num_known += baseline.apply_baseline([error_log], known_issues)
+        if ndjson is not None:
+            ndjson.write_log(error_log)
+        return error_log.has_errors_above(args.level)
+
+    scanned: dict[str, error_logging.ErrorLogger] = {}
+    tasks: list[tuple[pathlib.Path, Optional[splitter.Piece]]] = []
+    for file in files:
+        # Only a resumed scan needs the hash before deciding what to scan, otherwise it
+        # is taken in the worker from the text it scans
+        if scan_journal is not None and args.resume:
+            journalled = scan_journal.lookup(str(file), storage.file_digest(file))
+            if journalled is not None:
+                scanned[str(file)] = journalled
+                _finished(journalled)
+                continue
+
+        tasks.extend(file_tasks(file, args))
+
+    not_scanned: list[pathlib.Path] = []
+    not_started: list[tuple[pathlib.Path, Optional[splitter.Piece]]] = []
+    results: Iterator[error_logging.ErrorLogger]
+    upcoming = dict.fromkeys(file for file, _ in tasks)
+    with worker_pool(args.parallel) as p, Prefetcher(upcoming, args.prefetch) as prefetcher:
+        if args.time_budget is None:
+            results = p.imap_unordered(scanner, tasks)
+            deadline = float("inf")
+        else:
+            deadline = start_time + args.time_budget
+            results = budget.run_within_budget(
+                p,
+                scanner,
+                tasks,
+                processes=args.parallel,
+                deadline=deadline,
+                not_started=not_started,
+            )
+
+        failed = False
+        for error_log in completed_files(results, tasks):
+            prefetcher.done()
+            scanned[error_log.filename] = error_log
+            if scan_journal is not None and error_log.digest is not None:
+                scan_journal.record(error_log, error_log.digest)
+            if _finished(error_log) and args.fail_fast:
+                failed = True
+                break
+
+        # Files with pieces which were not started are left out entirely
+        error_list = [scanned[str(file)] for file in files if str(file) in scanned]
+        not_scanned.extend(dict.fromkeys(file for file, _ in not_started))
+
+        # Archive members are streamed to the workers without being extracted
+        for archive_file in archives:
+            if failed:
+                break
+            if time.monotonic() >= deadline:
+                not_scanned.append(archive_file)
+                continue
+            for error_log in p.imap(member_scanner, archive.iter_named_members(archive_file)):
+                error_list.append(error_log)
+                if _finished(error_log) and args.fail_fast:
+                    failed = True
+                    break
+
+        # Leaving the pool terminates any work still outstanding
+
+    if scan_journal is not None:
+        scan_journal.close()
+    if ndjson is not None:
+        ndjson.close()
+    if known_issues is not None:
+        logging.debug("%d issues suppressed by baseline %s", num_known, args.baseline)
 
     error_logs = {}
+    print_style = PrintStyle[args.format]
+    # rich is only worth its cost when writing to an interactive terminal, and not at all if quiet
+    plain = args.quiet or print_style is PrintStyle.GCC or not sys.stdout.isatty()
 
-    for file, error_log in zip(args.file, error_list):
+    for error_log in error_list:
+        file = error_log.filename
         # Report any errors
         if not args.quiet:
-            error_log.print_errors(CONSOLE, level=args.level, print_style=PrintStyle[args.format])
-
             err_count = error_log.count_errors()
-
-            CONSOLE.print(
+            summary = (
                 f"{len(error_log.errors)} issues in {file} ({err_count['Error']} errors,"
                 f" {err_count['Warn']} warnings, {err_count['Info']} info)"
+                + (f", stopped after {len(error_log.errors)}" if error_log.truncated else "")
             )
-        error_logs[str(file)] = error_log
+
+            if plain:
+                write_plain(
+                    error_log.format_errors(args.level, print_style=print_style) + summary + "\n"
+                )
+            else:
+                error_log.print_errors(get_console(), level=args.level, print_style=print_style)
+                get_console().print(summary)
+        error_logs[file] = error_log
+
+    if failed and not args.quiet:
+        get_console().print("Stopped at the first file with errors (--fail-fast)", style="yellow")
+
+    if not_scanned and not args.quiet:
+        get_console().print(
+            f"Time budget of {args.time_budget}s ran out before scanning {len(not_scanned)} files:",
+            style="yellow",
+        )
+        for file in not_scanned:
+            get_console().print(f"  {file}", markup=False, highlight=False)
 
     # Write junit xml file
     if args.xml:
-        write_xml(args.xml, error_logs, error_logging.ERROR_SEVERITY[args.level])
+        from castep_linter.error_logging.xml_writer import write_xml
+
+        write_xml(
+            args.xml,
+            error_logs,
+            error_logging.ERROR_SEVERITY[args.level],
+            not_scanned=[str(file) for file in not_scanned],
+        )
     if args.json:
+        from castep_linter.error_logging.json_writer import write_jenkins
+
         write_jenkins(args.json, error_logs, error_logging.ERROR_SEVERITY[args.level])
     if args.codeclimate:
+        from castep_linter.error_logging.json_writer import write_codeclimate
+
         write_codeclimate(args.codeclimate, error_logs, error_logging.ERROR_SEVERITY[args.level])
 
     # Exit with an error code if there were any errors
@@ -0,0 +1,127 @@
+"""Count issues by rule type, severity and directory without keeping the messages
+
+Workers reduce each file to a count vector with one entry per rule type and
+severity, so only a short list of integers is sent back to the parent, which
+adds the vectors up for every directory containing the file.
+"""
+
+import json
+import pathlib
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Dict, Iterable, List, Tuple
+
+from castep_linter.error_logging import ERROR_SEVERITY, ErrorLogger
+from castep_linter.error_logging.json_writer import determine_type
+from castep_linter.tests import RULE_TYPES
+
+if TYPE_CHECKING:
+    from rich.console import Console
+
+# Categories from determine_type
+RULE_COLUMNS = [*RULE_TYPES, "UNKNOWN"]
+SEVERITY_COLUMNS = list(ERROR_SEVERITY)
+
+CountVector = List[int]
+
+_RULE_INDEX = {rule_type: i for i, rule_type in enumerate(RULE_COLUMNS)}
+_SEVERITY_INDEX = {severity: i for i, severity in enumerate(ERROR_SEVERITY.values())}
+
+
+def empty_vector() -> CountVector:
+    """Get a count vector with no issues"""
+    return [0] * (len(RULE_COLUMNS) * len(SEVERITY_COLUMNS))
+
+
+def count_vector(error_log: ErrorLogger) -> CountVector:
+    """Count the issues in a log by rule type and severity"""
+    counts = empty_vector()
+    for err in error_log:
+        rule_index = _RULE_INDEX.get(determine_type(err.message), _RULE_INDEX["UNKNOWN"])
+        counts[rule_index * len(SEVERITY_COLUMNS) + _SEVERITY_INDEX[err.ERROR_SEVERITY]] += 1
+    return counts
+
+
+def add_vectors(total: CountVector, counts: CountVector) -> None:
+    """Add a count vector to a running total in place"""
+    for i, count in enumerate(counts):
+        total[i] += count
+
+
+@dataclass
+class DirectorySummary:
+    """Total issue counts for all the files below a directory"""
+
+    files: int = 0
+    counts: CountVector = field(default_factory=empty_vector)
+
+    def by_severity(self) -> Dict[str, int]:
+        """Total the counts for each severity"""
+        num_sev = len(SEVERITY_COLUMNS)
+        return {
+            severity: sum(self.counts[i::num_sev]) for i, severity in enumerate(SEVERITY_COLUMNS)
+        }
+
+    def by_rule(self) -> Dict[str, Dict[str, int]]:
+        """Get the non-zero counts for each rule type and severity"""
+        num_sev = len(SEVERITY_COLUMNS)
+        result: Dict[str, Dict[str, int]] = {}
+        for i, rule_type in enumerate(RULE_COLUMNS):
+            row = self.counts[i * num_sev : (i + 1) * num_sev]
+            if any(row):
+                result[rule_type] = dict(zip(SEVERITY_COLUMNS, row))
+        return result
+
+
+def rollup(file_counts: Iterable[Tuple[str, CountVector]]) -> Dict[str, DirectorySummary]:
+    """Add up the counts for each file into every directory which contains it"""
+    summaries: Dict[str, DirectorySummary] = {}
+    for filename, counts in file_counts:
+        parent = pathlib.PurePath(filename).parent
+        for directory in [parent, *parent.parents]:
+            summary = summaries.setdefault(str(directory), DirectorySummary())
+            summary.files += 1
+            add_vectors(summary.counts, counts)
+    return dict(sorted(summaries.items(), key=lambda item: pathlib.PurePath(item[0]).parts))
+
+
+def print_statistics(console: "Console", summaries: Dict[str, DirectorySummary]) -> None:
+    """Print a table of the issues in each directory, indented by depth"""
+    from rich.table import Table
+
+    used_rules = [
+        rule_type
+        for rule_type in RULE_COLUMNS
+        if any(rule_type in summary.by_rule() for summary in summaries.values())
+    ]
+
+    table = Table(title="Lint statistics")
+    table.add_column("Directory")
+    table.add_column("Files", justify="right")
+    for column in SEVERITY_COLUMNS + used_rules:
+        table.add_column(column, justify="right")
+
+    for directory, summary in summaries.items():
+        path = pathlib.PurePath(directory)
+        by_rule = summary.by_rule()
+        table.add_row(
+            "  " * len(path.parts) + (path.name or directory),
+            str(summary.files),
+            *(str(count) for count in summary.by_severity().values()),
+            *(str(sum(by_rule.get(rule_type, {}).values())) for rule_type in used_rules),
+        )
+
+    console.print(table)
+
+
+def write_statistics(file: pathlib.Path, summaries: Dict[str, DirectorySummary]) -> None:
+    """Write the issue counts for each directory as json"""
+    report = {
+        directory: {
+            "files": summary.files,
+            "severity": summary.by_severity(),
+            "rules": summary.by_rule(),
+        }
+        for directory, summary in summaries.items()
+    }
+    with open(file, "w", encoding="utf-8") as out_file:
+        json.dump(report, out_file, indent=2)
@@ -0,0 +1,49 @@
+"""Lint a stream of documents sent down a single pipe
+
+Each document is a header line holding the length of its contents in bytes
+and its path, separated by a space, followed by exactly that many bytes:
+
+    <length> <path>\\n<contents>
+
+The issues in each document are written out as newline delimited json as soon
+as it has been scanned, followed by a record with "done" set so that clients
+know the document is finished, even if it had no issues.
+"""
+
+from typing import BinaryIO, Iterable, Iterator, Tuple
+
+from castep_linter.error_logging.ndjson_writer import NdjsonWriter
+from castep_linter.linter import Linter
+
+
+def read_documents(stream: BinaryIO) -> Iterator[Tuple[str, bytes]]:
+    """Read the path and contents of each document until the end of the stream"""
+    while True:
+        header = stream.readline()
+        if not header:
+            return
+
+        length, sep, name = header.rstrip(b"\r\n").partition(b" ")
+        if not sep or not length.isdigit() or not name:
+            err = f"Bad document header {header!r}, expected b'<length> <path>\\n'"
+            raise ValueError(err)
+
+        contents = stream.read(int(length))
+        if len(contents) < int(length):
+            err = f"Stream ended {len(contents)} bytes into {int(length)} byte document {name!r}"
+            raise ValueError(err)
+
+        yield name.decode("utf-8", errors="replace"), contents
+
+
+def lint_documents(
+    linter: Linter, documents: Iterable[Tuple[str, bytes]], writer: NdjsonWriter
+) -> int:
+    """Lint and write out the results for each document in turn, returning the number linted"""
+    count = 0
+    for name, contents in documents:
+        error_log = linter.lint_bytes(contents, name)
+        writer.write_log(error_log)
+        writer.write_end(error_log)
+        count += 1
+    return count
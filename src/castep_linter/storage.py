@@ -0,0 +1,29 @@
+"""Helpers for the files kept between runs, ie the caches, index and journal
+
+The same files can be shared by several linters running at once, so they are
+replaced whole rather than written in place, and sources are identified by a
+hash of their contents rather than their modification times.
+"""
+
+import hashlib
+import os
+import pathlib
+
+
+def source_digest(raw_text: bytes) -> str:
+    """Hash the contents of a source file"""
+    return hashlib.sha1(raw_text).hexdigest()  # noqa: S324
+
+
+def file_digest(file: pathlib.Path) -> str:
+    """Hash the contents of a file on disk"""
+    with file.open("rb") as fd:
+        return source_digest(fd.read())
+
+
+def write_atomic(file: pathlib.Path, data: bytes) -> None:
+    """Write a file through a temporary one, so readers never see it half written"""
+    file.parent.mkdir(parents=True, exist_ok=True)
+    tmp_file = file.with_name(f"{file.name}.{os.getpid()}.tmp")
+    tmp_file.write_bytes(data)
+    tmp_file.replace(file)
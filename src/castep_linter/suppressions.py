@@ -0,0 +1,117 @@
+"""Inline comments which silence diagnostics
+
+Three forms of comment are recognised, each taking a comma separated list of
+rule types (or ALL):
+
+    x = 1.0  ! castep-lint: disable=LITERAL_KIND    (this line only)
+    ! castep-lint: disable-next-line=KIND           (the following line)
+    ! castep-lint: disable=ALLOC,KIND               (until a matching enable=
+    ...                                              or the end of the file)
+    ! castep-lint: enable=ALLOC,KIND
+"""
+
+import bisect
+import re
+import sys
+from typing import Dict, List, Tuple
+
+DIRECTIVE = re.compile(
+    rb"!\s*castep-lint\s*:\s*(disable-next-line|disable|enable)\s*=\s*(\w+(?:\s*,\s*\w+)*)",
+    re.IGNORECASE,
+)
+
+ALL_RULES = "ALL"
+
+# Inclusive range of suppressed lines
+LineRange = Tuple[int, int]
+
+
+def _merge(ranges: List[LineRange]) -> List[LineRange]:
+    """Sort line ranges and join any which overlap or touch"""
+    merged: List[LineRange] = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1] + 1:
+            merged[-1] = (merged[-1][0], max(end, merged[-1][1]))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+class SuppressionIndex:
+    """Suppressed line ranges for each rule type in a source file"""
+
+    def __init__(self, ranges: Dict[str, List[LineRange]]):
+        # A rule is suppressed wherever it is named or ALL rules are suppressed
+        all_ranges = ranges.get(ALL_RULES, [])
+        self.ranges = {
+            rule_type: _merge(rule_ranges + all_ranges) for rule_type, rule_ranges in ranges.items()
+        }
+        self.starts = {
+            rule_type: [start for start, _ in rule_ranges]
+            for rule_type, rule_ranges in self.ranges.items()
+        }
+
+    @classmethod
+    def from_source(cls, raw_text: bytes) -> "SuppressionIndex":
+        """Find all the suppression comments in a single pass over the source"""
+        ranges: Dict[str, List[LineRange]] = {}
+        open_blocks: Dict[str, int] = {}
+
+        line = 0
+        last_pos = 0
+        for match in DIRECTIVE.finditer(raw_text):
+            line += raw_text.count(b"\n", last_pos, match.start())
+            last_pos = match.start()
+
+            kind = match.group(1).lower()
+            rule_types = [r.strip().decode().upper() for r in match.group(2).split(b",")]
+
+            line_start = raw_text.rfind(b"\n", 0, match.start()) + 1
+            own_line = not raw_text[line_start : match.start()].strip()
+
+            for rule_type in rule_types:
+                if kind == b"disable-next-line":
+                    ranges.setdefault(rule_type, []).append((line + 1, line + 1))
+                elif kind == b"enable":
+                    if rule_type in open_blocks:
+                        ranges.setdefault(rule_type, []).append((open_blocks.pop(rule_type), line))
+                elif own_line:
+                    open_blocks.setdefault(rule_type, line)
+                else:
+                    ranges.setdefault(rule_type, []).append((line, line))
+
+        for rule_type, start in open_blocks.items():
+            ranges.setdefault(rule_type, []).append((start, sys.maxsize))
+
+        return cls(ranges)
+
+    def __bool__(self) -> bool:
+        return bool(self.ranges)
+
+    def _range_at(self, rule_type: str, line: int) -> LineRange:
+        """Get the suppressed range starting at or before a line, or an empty range"""
+        if rule_type not in self.ranges:
+            rule_type = ALL_RULES
+        starts = self.starts.get(rule_type)
+        if not starts:
+            return (0, -1)
+        i = bisect.bisect_right(starts, line) - 1
+        return self.ranges[rule_type][i] if i >= 0 else (0, -1)
+
+    def is_suppressed(self, rule_type: str, line: int) -> bool:
+        """Is a rule suppressed on a line"""
+        return line <= self._range_at(rule_type, line)[1]
+
+    def covers(self, rule_type: str, start_line: int, end_line: int) -> bool:
+        """Is a rule suppressed on every line in a range, so it need not be run there"""
+        return end_line <= self._range_at(rule_type, start_line)[1]
+
+    def region_key(self, start_line: int, end_line: int) -> str:
+        """Describe the suppressions within a range of lines relative to its start"""
+        parts = []
+        for rule_type in sorted(self.ranges):
+            for start, end in self.ranges[rule_type]:
+                if start <= end_line and end >= start_line:
+                    clipped = (max(start, start_line), min(end, end_line))
+                    parts.append(f"{rule_type}:{clipped[0] - start_line}-{clipped[1] - start_line}")
+        return ",".join(parts)
@@ -0,0 +1,318 @@
+"""Project-wide index of the symbols defined and used by each source file
+
+Indexing extracts a few compact facts from each file: the modules it defines
+and uses, its subroutines and functions and whether they are traced, and the
+kind parameters declared in its modules. The facts are stored keyed by the
+hash of the file contents, so only changed files are parsed again. The modules
+and uses also form the dependency graph --changed follows, with each
+submodule named ancestor:name and using its ancestor and parent.
+
+Rules which need to know about other files query the active index rather
+than parsing them, eg
+
+    index = active_index()
+    if index is not None and index.kind_parameter_module("dp") is None:
+        ...
+"""
+
+import functools
+import json
+import logging
+import os
+import pathlib
+from dataclasses import asdict, dataclass, field
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from tree_sitter import Node, Query
+
+from castep_linter.fortran.parser import FortranTree, get_fortran_language
+from castep_linter.storage import source_digest, write_atomic
+
+INDEX_VERSION = 4
+
+KIND_FUNCTIONS = {b"kind", b"selected_real_kind", b"selected_int_kind", b"selected_char_kind"}
+TRACE_ENTRY = b"trace_entry"
+
+# Only the nodes holding facts, so that the rest of the tree is not walked in Python
+FACTS_QUERY = """
+(module_statement (name) @module)
+(use_statement (module_name) @use)
+(submodule_statement) @submodule
+(subroutine) @routine
+(function) @routine
+(module (variable_declaration) @declaration)
+"""
+
+
+@dataclass
+class FileFacts:
+    """Symbols defined and used by one source file, all in lower case"""
+
+    modules: List[str] = field(default_factory=list)
+    uses: List[str] = field(default_factory=list)
+    # Whether each subroutine or function calls trace_entry
+    routines: Dict[str, bool] = field(default_factory=dict)
+    # The module each kind parameter is declared in
+    kind_parameters: Dict[str, str] = field(default_factory=dict)
+
+
+@functools.lru_cache(maxsize=None)
+def _facts_query() -> Query:
+    return get_fortran_language().query(FACTS_QUERY)
+
+
+def _text(node: Node) -> str:
+    """Get the lower case text of a node"""
+    return (node.text or b"").decode(errors="replace").lower()
+
+
+def _name(node: Node, child_type: str) -> Optional[str]:
+    """Get the lower case text of the first named child of a type"""
+    for child in node.named_children:
+        if child.type == child_type and child.text is not None:
+            return _text(child)
+    return None
+
+
+def _is_integer_parameter(node: Node) -> bool:
+    """Is a variable declaration for integer parameters"""
+    types = [child.text.lower() for child in node.named_children if child.text is not None]
+    return b"integer" in types and b"parameter" in types
+
+
+def _is_kind_value(node: Node) -> bool:
+    """Does the value of a parameter look like a kind, eg selected_real_kind(15) or real64"""
+    if node.type == "identifier":
+        return True
+    if node.type == "call_expression" and node.named_children:
+        callee = node.named_children[0].text
+        return callee is not None and callee.lower() in KIND_FUNCTIONS
+    return False
+
+
+def _is_traced(node: Node) -> bool:
+    """Does a routine call trace_entry directly in its body"""
+    return any(
+        child.type == "subroutine_call"
+        and child.named_children
+        and (child.named_children[0].text or b"").lower() == TRACE_ENTRY
+        for child in node.named_children
+    )
+
+
+def extract_facts(fort_tree: FortranTree) -> FileFacts:
+    """Collect the indexed symbols from a parsed file"""
+    facts = FileFacts()
+    captures = _facts_query().captures(fort_tree.tree.root_node)
+
+    def _nodes(capture: str) -> List[Node]:
+        return sorted(captures.get(capture, []), key=lambda node: node.start_byte)
+
+    modules = [(node.start_byte, _text(node)) for node in _nodes("module")]
+    uses = [(node.start_byte, _text(node)) for node in _nodes("use")]
+    for node in _nodes("submodule"):
+        # A submodule is known as ancestor:name, and depends on its ancestor and parent
+        ancestor = node.child_by_field_name("ancestor")
+        parent = node.child_by_field_name("parent")
+        name = _name(node, "name")
+        if ancestor is None or name is None:
+            continue
+        modules.append((node.start_byte, f"{_text(ancestor)}:{name}"))
+        uses.append((node.start_byte, _text(ancestor)))
+        if parent is not None:
+            uses.append((node.start_byte, f"{_text(ancestor)}:{_text(parent)}"))
+    facts.modules.extend(module for _, module in sorted(modules))
+    facts.uses.extend(dict.fromkeys(module for _, module in sorted(uses)))
+
+    for node in _nodes("routine"):
+        name = _name(node.named_children[0], "name") if node.named_children else None
+        if name is not None:
+            facts.routines[name] = _is_traced(node)
+
+    for node in _nodes("declaration"):
+        if node.parent is None or not _is_integer_parameter(node):
+            continue
+        module = _name(node.parent.named_children[0], "name") or ""
+        for assignment in node.named_children:
+            if assignment.type != "assignment_statement" or not assignment.named_children:
+                continue
+            target, *value = assignment.named_children
+            if target.text is not None and value and _is_kind_value(value[0]):
+                facts.kind_parameters[_text(target)] = module
+    return facts
+
+
+def index_file(task: Tuple[pathlib.Path, Optional[str]]) -> Tuple[str, str, Optional[FileFacts]]:
+    """Index a file in a worker, skipping the parse if it still has the digest it was indexed at"""
+    file, old_digest = task
+    with file.open("rb") as fd:
+        raw_text = fd.read()
+    digest = source_digest(raw_text)
+    if digest == old_digest:
+        return str(file), digest, None
+    return str(file), digest, extract_facts(FortranTree(raw_text))
+
+
+class SymbolIndex:
+    """Facts for each indexed file, with lookups across all of them"""
+
+    def __init__(self, entries: Optional[Dict[str, Tuple[str, FileFacts]]] = None):
+        # Content hash and facts for each file
+        self.entries: Dict[str, Tuple[str, FileFacts]] = entries or {}
+        self._lookups: Optional[Dict[str, Dict[str, List[str]]]] = None
+
+    @staticmethod
+    def load(file: pathlib.Path) -> "SymbolIndex":
+        """Read an index from disk, or start an empty one if it cannot be used"""
+        try:
+            with file.open("r", encoding="utf-8") as fd:
+                data = json.load(fd)
+        except (OSError, ValueError):
+            return SymbolIndex()
+
+        if data.get("version") != INDEX_VERSION:
+            return SymbolIndex()
+
+        return SymbolIndex(
+            {
+                name: (entry["hash"], FileFacts(**entry["facts"]))
+                for name, entry in data["files"].items()
+            }
+        )
+
+    def save(self, file: pathlib.Path) -> None:
+        """Write the index to disk"""
+        data = {
+            "version": INDEX_VERSION,
+            "files": {
+                name: {"hash": digest, "facts": asdict(facts)}
+                for name, (digest, facts) in self.entries.items()
+            },
+        }
+        write_atomic(file, json.dumps(data, separators=(",", ":")).encode())
+
+    def update(
+        self,
+        files: Iterable[pathlib.Path],
+        imap: Callable[..., Iterator] = map,
+    ) -> int:
+        """Index any of the files which are new or have changed, using a (parallel) map
+        function, and forget files which no longer exist. Returns the number parsed."""
+        for name in [name for name in self.entries if not os.path.exists(name)]:
+            del self.entries[name]
+
+        # Stored by absolute path, so the index can be shared between working directories
+        paths = [pathlib.Path(file).resolve() for file in files]
+        tasks = [(path, self.entries.get(str(path), (None,))[0]) for path in paths]
+        parsed = 0
+        for name, digest, facts in imap(index_file, tasks):
+            if facts is not None:
+                self.entries[name] = (digest, facts)
+                parsed += 1
+        self._lookups = None
+        logging.debug("Indexed %d files, %d unchanged", parsed, len(tasks) - parsed)
+        return parsed
+
+    def modules_defined(self, files: Iterable[pathlib.Path]) -> Set[str]:
+        """Get the modules defined by some (absolute) files"""
+        return {
+            module
+            for file in files
+            if str(file) in self.entries
+            for module in self.entries[str(file)][1].modules
+        }
+
+    def affected(self, changed: Iterable[pathlib.Path], modules: Iterable[str] = ()) -> Set[str]:
+        """Get the files which should be linted again after some (absolute) files have changed
+
+        These are the changed files and every file which uses a module defined in
+        them, directly or through other modules. Modules which have been removed
+        from the changed files, and so are no longer in the index, can be given."""
+        changed = list(changed)
+        affected = {str(file) for file in changed}
+        pending = [*modules, *self.modules_defined(changed)]
+        seen = set()
+        while pending:
+            module = pending.pop()
+            if module in seen:
+                continue
+            seen.add(module)
+            for user in self.module_users(module):
+                if user not in affected:
+                    affected.add(user)
+                    pending.extend(self.entries[user][1].modules)
+        return affected
+
+    def _lookup(self, kind: str) -> Dict[str, List[str]]:
+        """Get a map from each symbol of a kind to the files or modules it is in"""
+        if self._lookups is None:
+            lookups: Dict[str, Dict[str, List[str]]] = {
+                "module": {},
+                "use": {},
+                "routine": {},
+                "traced": {},
+                "kind": {},
+            }
+            for name, (_, facts) in self.entries.items():
+                for module in facts.modules:
+                    lookups["module"].setdefault(module, []).append(name)
+                for module in facts.uses:
+                    lookups["use"].setdefault(module, []).append(name)
+                for routine, traced in facts.routines.items():
+                    lookups["routine"].setdefault(routine, []).append(name)
+                    if traced:
+                        lookups["traced"].setdefault(routine, []).append(name)
+                for kind_param, module in facts.kind_parameters.items():
+                    lookups["kind"].setdefault(kind_param, []).append(module)
+            self._lookups = lookups
+        return self._lookups[kind]
+
+    def module_files(self, module: str) -> List[str]:
+        """Get the files defining a module"""
+        return self._lookup("module").get(module.lower(), [])
+
+    def module_users(self, module: str) -> List[str]:
+        """Get the files which use a module"""
+        return self._lookup("use").get(module.lower(), [])
+
+    def routine_files(self, routine: str) -> List[str]:
+        """Get the files defining a subroutine or function"""
+        return self._lookup("routine").get(routine.lower(), [])
+
+    def is_traced(self, routine: str) -> Optional[bool]:
+        """Check whether a routine calls trace_entry, or None if it is not indexed"""
+        if not self.routine_files(routine):
+            return None
+        return bool(self._lookup("traced").get(routine.lower()))
+
+    def kind_parameter_module(self, kind_param: str) -> Optional[str]:
+        """Get the module declaring a kind parameter, or None if it is not indexed"""
+        modules = self._lookup("kind").get(kind_param.lower())
+        return modules[0] if modules else None
+
+
+# Saved index set for the current scan, only read once a rule asks for it
+_active: Optional[pathlib.Path] = None
+
+
+def activate(file: Optional[pathlib.Path]) -> None:
+    """Make the index saved in a file available to rules, or none if None"""
+    global _active  # noqa: PLW0603
+    _active = file
+
+
+def active_index() -> Optional[SymbolIndex]:
+    """Get the index rules should query, if any, loading it again if it has been saved since"""
+    if _active is None:
+        return None
+    try:
+        mtime = _active.stat().st_mtime_ns
+    except OSError:
+        return None
+    return _load_cached(_active, mtime)
+
+
+@functools.lru_cache(maxsize=1)
+def _load_cached(file: pathlib.Path, _mtime: int) -> SymbolIndex:
+    """Load an index once per process, until it is saved again"""
+    return SymbolIndex.load(file)
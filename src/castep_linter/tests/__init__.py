@@ -1,17 +1,28 @@
-""""Tests to be performed by the CASTEP Fortran linter"""
+""" "Tests to be performed by the CASTEP Fortran linter"""
 
-from typing import Callable
+from typing import Callable, Optional, Set, Tuple
+
+from tree_sitter import Node
 
 from castep_linter.error_logging.logger import ErrorLogger
 from castep_linter.fortran.fortran_nodes import FortranNode
+from castep_linter.fortran.parser import FortranTree
 from castep_linter.tests.allocate_stat_checked import check_allocate_has_stat
 from castep_linter.tests.complex_has_dp import check_complex_has_dp
 from castep_linter.tests.has_trace_entry_exit import check_trace_entry_exit
+from castep_linter.tests.lexical import (
+    check_dos_line_endings,
+    check_tabs,
+    check_trailing_whitespace,
+)
 from castep_linter.tests.number_literal_correct_kind import check_number_literal
 from castep_linter.tests.real_declaration_has_dp import check_real_dp_declaration
+from castep_linter.tests.rule_info import get_rule_max_severity, get_rule_type
 
 CheckFunction = Callable[[FortranNode, ErrorLogger], None]
 CheckFunctionDict = dict[str, list[CheckFunction]]
+LexicalCheckFunction = Callable[[bytes, ErrorLogger], None]
+BatchCheckFunction = Callable[[FortranTree, Node, ErrorLogger], None]
 
 test_list: CheckFunctionDict = {
     "variable_declaration": [check_real_dp_declaration],
@@ -20,3 +31,39 @@ test_list: CheckFunctionDict = {
     "call_expression": [check_complex_has_dp, check_allocate_has_stat],
     "number_literal": [check_number_literal],
 }
+
+# Tests run on the raw source before (or instead of) parsing
+lexical_test_list: list[LexicalCheckFunction] = [
+    check_tabs,
+    check_dos_line_endings,
+    check_trailing_whitespace,
+]
+
+RULE_TYPES = sorted(
+    {get_rule_type(test) for tests in test_list.values() for test in tests}
+    | {get_rule_type(test) for test in lexical_test_list}
+)
+
+
+def select_tests(
+    rule_types: Optional[Set[str]] = None, min_severity: int = 0
+) -> Tuple[CheckFunctionDict, list[LexicalCheckFunction]]:
+    """Get the tests reporting the requested types of issue, or all tests if None,
+    skipping any which can only report messages below min_severity"""
+
+    def _selected(test: Callable) -> bool:
+        if rule_types is not None and get_rule_type(test) not in rule_types:
+            return False
+        max_severity = get_rule_max_severity(test)
+        return max_severity is None or max_severity >= min_severity
+
+    if rule_types is None and min_severity == 0:
+        return test_list, lexical_test_list
+
+    tests = {
+        node_type: [test for test in node_tests if _selected(test)]
+        for node_type, node_tests in test_list.items()
+    }
+    tests = {node_type: node_tests for node_type, node_tests in tests.items() if node_tests}
+    lexical_tests = [test for test in lexical_test_list if _selected(test)]
+    return tests, lexical_tests
@@ -11,6 +11,7 @@ from castep_linter.fortran.fortran_raw_types import Fortran
 from castep_linter.fortran.identifier import Identifier
 from castep_linter.fortran.node_type_err import WrongNodeError
 from castep_linter.tests import castep_identifiers
+from castep_linter.tests.rule_info import rule
 
 
 def check_allocate_error_names(
@@ -85,6 +86,7 @@ def variable_name_from_allocate(routine: FortranCallExpression):
         raise ValueError(msg) from exc
 
 
+@rule("ALLOC", tokens=["allocate"], callees=["allocate"], severities=["Error", "Warning"])
 def check_allocate_has_stat(node: FortranNode, error_log: ErrorLogger) -> None:
     """Test that allocate stat is used and checked"""
 
@@ -4,8 +4,10 @@ from castep_linter.error_logging import ErrorLogger
 from castep_linter.fortran.fortran_nodes import FortranCallExpression, FortranNode
 from castep_linter.fortran.node_type_err import WrongNodeError
 from castep_linter.tests import castep_identifiers
+from castep_linter.tests.rule_info import rule
 
 
+@rule("CMPLX_KIND", tokens=["cmplx"], callees=["cmplx"], severities=["Error"])
 def check_complex_has_dp(node: FortranNode, error_log: ErrorLogger) -> None:
     """Test that a call of complex(x) has a dp"""
 
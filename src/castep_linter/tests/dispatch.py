@@ -0,0 +1,124 @@
+"""Look up which tests to run on a node without wrapping it first"""
+
+import heapq
+from typing import Dict, List, Optional
+
+from tree_sitter import Node
+
+from castep_linter.error_logging import ErrorLogger
+from castep_linter.fortran import node_factory
+from castep_linter.fortran.parser import FortranTree
+from castep_linter.tests import BatchCheckFunction, CheckFunction, CheckFunctionDict
+from castep_linter.tests.rule_info import get_rule_batch, get_rule_callees, get_rule_type
+
+CALL_TYPES = {"call_expression", "subroutine_call"}
+
+
+def callee_name(node: Node) -> Optional[bytes]:
+    """Get the lower case name of the function or subroutine called by a call node"""
+    for child in node.named_children:
+        if child.type == "identifier":
+            return child.text.lower() if child.text is not None else None
+    return None
+
+
+def _suppressed_within(node: Node, error_log: ErrorLogger) -> bool:
+    """Is the rule being run suppressed on every line of a node"""
+    return error_log.suppressions is not None and error_log.suppressions.covers(
+        error_log.rule_type, node.start_point[0], node.end_point[0]
+    )
+
+
+class DispatchTable:
+    """Tests indexed by node type and, for calls, by the name of the callee
+
+    If batched, tests with a batch version are taken out of the table and
+    should instead be run once per tree with run_batch_tests."""
+
+    def __init__(self, tests: CheckFunctionDict, *, batched: bool = True):
+        self.by_type: Dict[str, List[CheckFunction]] = {}
+        self.by_callee: Dict[str, Dict[bytes, List[CheckFunction]]] = {}
+        self.batch_tests: List[BatchCheckFunction] = []
+
+        for node_type, all_node_tests in tests.items():
+            node_tests = []
+            for test in all_node_tests:
+                batch_test = get_rule_batch(test) if batched else None
+                if batch_test is None:
+                    node_tests.append(test)
+                elif batch_test not in self.batch_tests:
+                    self.batch_tests.append(batch_test)
+
+            if not node_tests:
+                continue
+
+            # Tests without callees apply to every call
+            self.by_type[node_type] = [t for t in node_tests if get_rule_callees(t) is None]
+
+            callees = {c for t in node_tests for c in get_rule_callees(t) or ()}
+            if node_type in CALL_TYPES and callees:
+                self.by_callee[node_type] = {
+                    callee: [t for t in node_tests if callee in (get_rule_callees(t) or {callee})]
+                    for callee in callees
+                }
+
+    def __contains__(self, node_type: str) -> bool:
+        return node_type in self.by_type
+
+    def run_batch_tests(
+        self, fort_tree: FortranTree, root: Node, error_log: ErrorLogger, first: int = 0
+    ) -> None:
+        """Run the batched tests on all the nodes below root, after the per node tests
+
+        The messages are merged in source order with those logged from first on,
+        as if the batched tests had been run node by node during the walk."""
+        for test in self.batch_tests:
+            # Logged separately, so the per node messages do not count towards its limit
+            batch_log = ErrorLogger(
+                error_log.filename,
+                min_severity=error_log.min_severity,
+                suppressions=error_log.suppressions,
+                rule_type=get_rule_type(test),
+                max_errors=error_log.max_errors,
+            )
+            if _suppressed_within(root, batch_log):
+                continue
+            test(fort_tree, root, batch_log)
+            if not batch_log.errors:
+                continue
+
+            # Ties go to the per node messages, which are for the enclosing nodes
+            error_log.errors[first:] = heapq.merge(
+                error_log.errors[first:], batch_log.errors, key=lambda err: err.start_point
+            )
+            error_log.truncated |= batch_log.truncated
+            error_log.truncate()
+
+    def run_tests(self, node: Node, error_log: ErrorLogger) -> None:
+        """Run all the relevant tests on a node, only wrapping it if there are any"""
+        # Have to check for is_named here as we want the statements,
+        # not literal words like subroutine
+        if not node.is_named or node.type not in self.by_type:
+            return
+
+        tests = self.tests_for(node)
+        if tests:
+            wrapped = None
+            for test in tests:
+                error_log.rule_type = get_rule_type(test)
+                # Rules silenced over the whole node are not run at all
+                if _suppressed_within(node, error_log):
+                    continue
+                if wrapped is None:
+                    wrapped = node_factory.wrap_node(node)
+                test(wrapped, error_log)
+
+    def tests_for(self, node: Node) -> List[CheckFunction]:
+        """Get the tests to run on a named node"""
+        callee_tests = self.by_callee.get(node.type)
+        if callee_tests is not None:
+            name = callee_name(node)
+            if name in callee_tests:
+                return callee_tests[name]
+
+        return self.by_type.get(node.type, [])
@@ -10,6 +10,7 @@ from castep_linter.fortran.fortran_raw_types import Fortran, FType
 from castep_linter.fortran.identifier import Identifier
 from castep_linter.fortran.node_type_err import WrongNodeError
 from castep_linter.tests import castep_identifiers
+from castep_linter.tests.rule_info import rule
 
 
 def correct_trace_name(trace_name: str, subroutine_name: Identifier):
@@ -21,6 +22,7 @@ def correct_trace_name(trace_name: str, subroutine_name: Identifier):
         return trace_name == subroutine_name
 
 
+@rule("TRACE", tokens=["subroutine", "function"], severities=["Error", "Info"])
 def check_trace_entry_exit(node: FortranNode, error_log: ErrorLogger) -> None:
     """Test that a subroutine or function has a trace_entry and trace_exit with the correct name"""
 
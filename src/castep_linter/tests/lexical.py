@@ -0,0 +1,69 @@
+"""Tests which run directly on the raw bytes of a source file, without parsing"""
+
+import bisect
+import re
+from typing import List, Optional, Tuple
+
+from castep_linter.error_logging import ErrorLogger
+from castep_linter.tests.rule_info import rule
+
+TABS = re.compile(rb"\t+")
+DOS_LINE_ENDING = re.compile(rb"\r\n")
+TRAILING_WHITESPACE = re.compile(rb"[ \t]+(?=\r?\n|\Z)")
+
+
+class LineIndex:
+    """Convert byte offsets in a source file into (row, column) points"""
+
+    def __init__(self, raw_text: bytes):
+        self.line_starts: List[int] = [0]
+        self.line_starts.extend(m.end() for m in re.finditer(rb"\n", raw_text))
+
+    def point(self, offset: int) -> Tuple[int, int]:
+        """Get the row and column of a byte offset"""
+        row = bisect.bisect_right(self.line_starts, offset) - 1
+        return row, offset - self.line_starts[row]
+
+
+def report_matches(
+    raw_text: bytes,
+    pattern: "re.Pattern[bytes]",
+    error_log: ErrorLogger,
+    level: str,
+    message: str,
+    *,
+    first_only: bool = False,
+) -> None:
+    """Add a message for every match of a pattern in the source"""
+    index: Optional[LineIndex] = None
+    for match in pattern.finditer(raw_text):
+        # Only build the line index once we know there is something to report
+        if index is None:
+            index = LineIndex(raw_text)
+        error_log.add_msg_at(level, index.point(match.start()), index.point(match.end()), message)
+        if first_only:
+            return
+
+
+@rule("TABS", severities=["Warning"])
+def check_tabs(raw_text: bytes, error_log: ErrorLogger) -> None:
+    """Test that the source does not contain tab characters"""
+    if raw_text.find(b"\t") < 0:
+        return
+    report_matches(raw_text, TABS, error_log, "Warning", "Tab character in source")
+
+
+@rule("LINE_ENDING", severities=["Warning"])
+def check_dos_line_endings(raw_text: bytes, error_log: ErrorLogger) -> None:
+    """Test that the source uses unix line endings"""
+    if raw_text.find(b"\r\n") < 0:
+        return
+    report_matches(
+        raw_text, DOS_LINE_ENDING, error_log, "Warning", "DOS line endings", first_only=True
+    )
+
+
+@rule("WHITESPACE", severities=["Info"])
+def check_trailing_whitespace(raw_text: bytes, error_log: ErrorLogger) -> None:
+    """Test that no lines end in whitespace"""
+    report_matches(raw_text, TRAILING_WHITESPACE, error_log, "Info", "Trailing whitespace")
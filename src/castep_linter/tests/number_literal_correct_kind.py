@@ -1,12 +1,53 @@
 """Test that a number literal has a dp (if real) or no dp if of any other type"""
 
+import functools
+import re
+
+from tree_sitter import Node, Query
+
 from castep_linter.error_logging import ErrorLogger
+from castep_linter.fortran import node_factory
 from castep_linter.fortran.fortran_nodes import FortranNode
 from castep_linter.fortran.fortran_raw_types import Fortran
 from castep_linter.fortran.node_type_err import WrongNodeError
+from castep_linter.fortran.parser import FortranTree, get_fortran_language
 from castep_linter.tests import castep_identifiers
+from castep_linter.tests.rule_info import rule
+
+
+def _kinds_pattern(kinds) -> bytes:
+    return b"|".join(re.escape(str(kind).encode()) for kind in sorted(kinds, key=str))
+
+
+# Literals which check_number_literal accepts, eg 1, 1_int64, 1.0_dp or 5.0d4
+VALID_LITERAL = re.compile(
+    rb"[^_.ed]*"
+    rb"|[^_]*d[^_]*"
+    rb"|[^_.ed]*_(?:" + _kinds_pattern(castep_identifiers.INT_KINDS) + rb")"
+    rb"|[^_]*[.ed][^_]*_(?:" + _kinds_pattern(castep_identifiers.DP_ALL) + rb")",
+    re.IGNORECASE,
+)
+
+
+@functools.lru_cache(maxsize=None)
+def _literal_query() -> Query:
+    return get_fortran_language().query(f"({Fortran.NUMBER_LITERAL.value}) @literal")
+
+
+@rule("LITERAL_KIND")
+def check_number_literals(fort_tree: FortranTree, root: Node, error_log: ErrorLogger) -> None:
+    """Test all the number literals below root at once, only wrapping those with problems"""
+    literals = _literal_query().captures(root).get("literal", [])
+    raw_text = fort_tree.raw_text
+
+    for literal in sorted(literals, key=lambda n: n.start_byte):
+        if error_log.full:
+            return
+        if not VALID_LITERAL.fullmatch(raw_text, literal.start_byte, literal.end_byte):
+            check_number_literal(node_factory.wrap_node(literal), error_log)
 
 
+@rule("LITERAL_KIND", severities=["Error"], batch=check_number_literals)
 def check_number_literal(node: FortranNode, error_log: ErrorLogger) -> None:
     """Test that a number literal has a dp (if real) or no dp if of any other type"""
 
@@ -0,0 +1,53 @@
+"""Skip tests which cannot report anything for a source file"""
+
+import functools
+import re
+from typing import FrozenSet, Set
+
+from castep_linter.tests import CheckFunctionDict
+from castep_linter.tests.rule_info import get_rule_tokens
+
+
+@functools.lru_cache(maxsize=None)
+def _token_pattern(tokens: FrozenSet[bytes]) -> "re.Pattern[bytes]":
+    """Compile a single case insensitive pattern matching any of the tokens"""
+    alternatives = b"|".join(re.escape(t) for t in sorted(tokens, key=len, reverse=True))
+    return re.compile(alternatives, re.IGNORECASE)
+
+
+def find_tokens(raw_text: bytes, tokens: FrozenSet[bytes]) -> Set[bytes]:
+    """Find which of the tokens appear in the source in a single pass"""
+    found: Set[bytes] = set()
+    if not tokens:
+        return found
+
+    for match in _token_pattern(tokens).finditer(raw_text):
+        found.add(match.group().lower())
+        if len(found) == len(tokens):
+            break
+
+    # A token may only have been seen as part of a longer one
+    found.update(t for t in tokens if any(t in f for f in found))
+    return found
+
+
+def active_tests(raw_text: bytes, tests: CheckFunctionDict) -> CheckFunctionDict:
+    """Prune the tests to those whose trigger tokens appear in the source"""
+    all_tokens = frozenset(
+        token
+        for node_tests in tests.values()
+        for test in node_tests
+        for token in get_rule_tokens(test) or ()
+    )
+    found = find_tokens(raw_text, all_tokens)
+
+    pruned: CheckFunctionDict = {}
+    for node_type, node_tests in tests.items():
+        active = []
+        for test in node_tests:
+            tokens = get_rule_tokens(test)
+            if tokens is None or not tokens.isdisjoint(found):
+                active.append(test)
+        if active:
+            pruned[node_type] = active
+    return pruned
@@ -10,8 +10,10 @@ from castep_linter.fortran.fortran_raw_types import Fortran, FType
 from castep_linter.fortran.identifier import Identifier
 from castep_linter.fortran.node_type_err import WrongNodeError
 from castep_linter.tests import castep_identifiers
+from castep_linter.tests.rule_info import rule
 
 
+@rule("KIND", tokens=["real", "complex"], severities=["Error", "Warning", "Info"])
 def check_real_dp_declaration(node: FortranNode, error_log: ErrorLogger) -> None:
     """Test that all real values are specified by real(kind=dp)"""
 
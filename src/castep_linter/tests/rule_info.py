@@ -0,0 +1,70 @@
+"""Metadata describing each test performed by the linter"""
+
+from typing import Callable, FrozenSet, Iterable, Optional, TypeVar
+
+from castep_linter.error_logging.error_types import fortran_error_class
+
+Check = TypeVar("Check", bound=Callable)
+
+RULE_TYPE_ATTR = "__rule_type__"
+RULE_TOKENS_ATTR = "__rule_tokens__"
+RULE_CALLEES_ATTR = "__rule_callees__"
+RULE_SEVERITIES_ATTR = "__rule_severities__"
+RULE_BATCH_ATTR = "__rule_batch__"
+
+
+def rule(
+    rule_type: str,
+    *,
+    tokens: Optional[Iterable[str]] = None,
+    callees: Optional[Iterable[str]] = None,
+    severities: Optional[Iterable[str]] = None,
+    batch: Optional[Callable] = None,
+) -> Callable[[Check], Check]:
+    """Decorator to record the type of issue reported by a test, eg ALLOC or KIND
+
+    If given, tokens lists the (case insensitive) words which must appear in a
+    source file for the test to be able to report anything, callees lists
+    the names of the functions or subroutines a call test should be run on,
+    severities lists the message levels (Error, Warning, Info) it may report and
+    batch is an equivalent test run once on a whole (sub)tree rather than per node."""
+
+    def _rule(func: Check) -> Check:
+        setattr(func, RULE_TYPE_ATTR, rule_type)
+        if tokens is not None:
+            setattr(func, RULE_TOKENS_ATTR, frozenset(t.lower().encode() for t in tokens))
+        if callees is not None:
+            setattr(func, RULE_CALLEES_ATTR, frozenset(c.lower().encode() for c in callees))
+        if severities is not None:
+            levels = [fortran_error_class(level).ERROR_SEVERITY for level in severities]
+            setattr(func, RULE_SEVERITIES_ATTR, max(levels))
+        if batch is not None:
+            setattr(func, RULE_BATCH_ATTR, batch)
+        return func
+
+    return _rule
+
+
+def get_rule_type(func: Callable) -> str:
+    """Get the type of issue reported by a test"""
+    return getattr(func, RULE_TYPE_ATTR, "UNKNOWN")
+
+
+def get_rule_tokens(func: Callable) -> Optional[FrozenSet[bytes]]:
+    """Get the tokens which trigger a test, or None if it may always report"""
+    return getattr(func, RULE_TOKENS_ATTR, None)
+
+
+def get_rule_callees(func: Callable) -> Optional[FrozenSet[bytes]]:
+    """Get the names of the calls a test applies to, or None if it applies to all calls"""
+    return getattr(func, RULE_CALLEES_ATTR, None)
+
+
+def get_rule_max_severity(func: Callable) -> Optional[int]:
+    """Get the most severe message a test can report, or None if unknown"""
+    return getattr(func, RULE_SEVERITIES_ATTR, None)
+
+
+def get_rule_batch(func: Callable) -> Optional[Callable]:
+    """Get the batched version of a test, if there is one"""
+    return getattr(func, RULE_BATCH_ATTR, None)
@@ -0,0 +1,130 @@
+"""Re-lint Fortran files below a directory whenever they change
+
+Changes are found by polling the modification times and sizes of the files,
+which needs no extra dependencies and works on any filesystem. Once a change
+is seen, the watcher waits for the tree to stop changing, so a burst of
+changes such as a branch switch is linted once, as a whole.
+"""
+
+import os
+import pathlib
+import time
+from typing import Dict, Iterable, List, NamedTuple, Tuple
+
+from castep_linter.error_logging import ErrorLogger
+from castep_linter.error_logging.baseline import fingerprint_errors
+from castep_linter.error_logging.error_types import FortranMsgBase
+from castep_linter.fortran.parser import is_fortran_file
+from castep_linter.linter import Linter
+
+Snapshot = Dict[pathlib.Path, Tuple[int, int]]
+
+
+class FileDelta(NamedTuple):
+    """Issues which have appeared in or disappeared from a file since it was last linted"""
+
+    filename: str
+    introduced: List[FortranMsgBase]
+    fixed: List[FortranMsgBase]
+
+
+def snapshot(directory: pathlib.Path) -> Snapshot:
+    """Get the modification time and size of every Fortran file below a directory"""
+    files = {}
+    for root, _, names in os.walk(directory):
+        for name in names:
+            if not is_fortran_file(name):
+                continue
+            file = pathlib.Path(root, name)
+            try:
+                stat = file.stat()
+            except OSError:
+                # Removed while walking
+                continue
+            files[file] = (stat.st_mtime_ns, stat.st_size)
+    return files
+
+
+def compare_snapshots(
+    old: Snapshot, new: Snapshot
+) -> Tuple[List[pathlib.Path], List[pathlib.Path]]:
+    """Find the files which have been added or modified, and those which have been removed"""
+    changed = [file for file, state in new.items() if old.get(file) != state]
+    removed = [file for file in old if file not in new]
+    return changed, removed
+
+
+class Watcher:
+    """Lints the files below a directory and keeps their issues to compare against"""
+
+    def __init__(
+        self,
+        linter: Linter,
+        directory: pathlib.Path,
+        *,
+        interval: float = 0.5,
+        settle: float = 0.3,
+    ):
+        self.linter = linter
+        self.directory = directory
+        self.interval = interval
+        self.settle = settle
+        self.files: Snapshot = {}
+        # Issues in each file, by fingerprint
+        self.issues: Dict[str, Dict[str, FortranMsgBase]] = {}
+
+    def start(self) -> List[FileDelta]:
+        """Lint every file, reporting all the issues as introduced"""
+        self.files = snapshot(self.directory)
+        return self.relint(sorted(self.files), [])
+
+    def wait_for_changes(self) -> Tuple[List[pathlib.Path], List[pathlib.Path]]:
+        """Block until files have changed and then stopped changing"""
+        while True:
+            time.sleep(self.interval)
+            current = snapshot(self.directory)
+            if current != self.files:
+                break
+
+        while True:
+            time.sleep(self.settle)
+            settled = snapshot(self.directory)
+            if settled == current:
+                break
+            current = settled
+
+        changed, removed = compare_snapshots(self.files, current)
+        self.files = current
+        return changed, removed
+
+    def relint(
+        self, changed: Iterable[pathlib.Path], removed: Iterable[pathlib.Path]
+    ) -> List[FileDelta]:
+        """Lint the changed files, returning how the issues in each file have changed"""
+        # Files can be deleted again before they are linted, eg by editor swap files
+        existing = [file for file in changed if file.exists()]
+        removed = [*removed, *(file for file in changed if file not in existing)]
+
+        deltas = []
+        for error_log in self.linter.lint_paths(existing):
+            deltas.append(self._update(error_log.filename, _by_fingerprint(error_log)))
+        for file in removed:
+            deltas.append(self._update(str(file), {}))
+        return [delta for delta in deltas if delta.introduced or delta.fixed]
+
+    def _update(self, filename: str, issues: Dict[str, FortranMsgBase]) -> FileDelta:
+        """Replace the issues for a file, returning the difference"""
+        old = self.issues.pop(filename, {})
+        if issues:
+            self.issues[filename] = issues
+        return FileDelta(
+            filename,
+            introduced=[err for key, err in issues.items() if key not in old],
+            fixed=[err for key, err in old.items() if key not in issues],
+        )
+
+
+def _by_fingerprint(error_log: ErrorLogger) -> Dict[str, FortranMsgBase]:
+    """Index the issues in a log by their fingerprints"""
+    fingerprint_errors(error_log)
+    return {err.fingerprint: err for err in error_log.errors if err.fingerprint is not None}
@@ -0,0 +1,85 @@
+# pylint: disable=W0621,C0116,C0114
+import io
+import json
+import pathlib
+import tarfile
+import zipfile
+from unittest import mock
+
+import pytest
+
+from castep_linter import archive, scan_files
+from castep_linter.scan_files import run_tests_on_code
+from castep_linter.tests import CheckFunctionDict, check_number_literal
+from tests.conftest import Parser
+
+MEMBERS = {
+    "castep/src/good.f90": b"z = 1.0_dp\n",
+    "castep/src/bad.F90": b"x = 1\nz = 1.0\n",
+    "castep/README": b"z = 1.0\n",
+}
+
+
+@pytest.fixture
+def test_list() -> CheckFunctionDict:
+    return {"number_literal": [check_number_literal]}
+
+
+@pytest.fixture(params=["w:gz", "w:xz"])
+def tarball(tmp_path: pathlib.Path, request: pytest.FixtureRequest) -> pathlib.Path:
+    suffix = {"w:gz": ".tar.gz", "w:xz": ".tar.xz"}[request.param]
+    file = tmp_path / f"castep{suffix}"
+    with tarfile.open(file, mode=request.param) as tar:
+        for name, data in MEMBERS.items():
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            tar.addfile(info, io.BytesIO(data))
+    return file
+
+
+@pytest.fixture
+def zip_archive(tmp_path: pathlib.Path) -> pathlib.Path:
+    file = tmp_path / "castep.zip"
+    with zipfile.ZipFile(file, "w") as zf:
+        for name, data in MEMBERS.items():
+            zf.writestr(name, data)
+    return file
+
+
+def test_is_archive():
+    assert archive.is_archive(pathlib.Path("castep-24.1.tar.gz"))
+    assert archive.is_archive(pathlib.Path("castep-24.1.TAR.XZ"))
+    assert archive.is_archive(pathlib.Path("castep-24.1.zip"))
+    assert not archive.is_archive(pathlib.Path("castep.f90"))
+
+
+def test_tar_members(tarball: pathlib.Path):
+    members = dict(archive.iter_fortran_members(tarball))
+    assert members == {k: v for k, v in MEMBERS.items() if k != "castep/README"}
+
+
+def test_zip_members(zip_archive: pathlib.Path):
+    members = dict(archive.iter_fortran_members(zip_archive))
+    assert members == {k: v for k, v in MEMBERS.items() if k != "castep/README"}
+
+
+def test_member_context(zip_archive: pathlib.Path, parse: Parser, test_list: CheckFunctionDict):
+    members = dict(archive.iter_fortran_members(zip_archive))
+    name = "castep/src/bad.F90"
+    error_log = run_tests_on_code(parse(members[name]), test_list, name)
+    assert len(error_log.errors) == 1
+
+    context = error_log.errors[0].context(name, source=members[name])
+    assert context.startswith(f"{name}:")
+    assert context.endswith(">z = 1.0")
+
+
+def test_same_member_in_two_archives(tarball: pathlib.Path, zip_archive: pathlib.Path):
+    report = tarball.parent / "report.json"
+    argv = ["castep-lint", "-q", "-c", str(report), str(tarball), str(zip_archive)]
+    with mock.patch("sys.argv", argv), pytest.raises(SystemExit) as exc:
+        scan_files.main()
+    assert exc.value.code == 1
+
+    paths = {issue["location"]["path"] for issue in json.loads(report.read_text())}
+    assert paths == {f"{tarball}/castep/src/bad.F90", f"{zip_archive}/castep/src/bad.F90"}
@@ -0,0 +1,57 @@
+# pylint: disable=W0621,C0116,C0114
+import json
+
+from castep_linter.error_logging import ErrorLogger, baseline
+from castep_linter.error_logging.json_writer import write_codeclimate
+
+SOURCE = b"z = 1.0\ny = 2.0\nz = 1.0\n"
+
+
+def make_log(source: bytes, lines: list[int]) -> ErrorLogger:
+    error_log = ErrorLogger("foo.f90", source=source)
+    for line in lines:
+        error_log.add_msg_at("Error", (line, 4), (line, 7), "Float literal without kind")
+    return error_log
+
+
+def fingerprints(error_log: ErrorLogger) -> list:
+    baseline.fingerprint_errors(error_log)
+    return [err.fingerprint for err in error_log]
+
+
+def test_fingerprint_stable_when_lines_move():
+    before = fingerprints(make_log(SOURCE, [1]))
+    after = fingerprints(make_log(b"! header\n" + SOURCE, [2]))
+    assert before == after
+
+
+def test_identical_issues_distinct():
+    prints = fingerprints(make_log(SOURCE, [0, 1, 2]))
+    assert len(set(prints)) == 3
+
+
+def test_codeclimate_fingerprints(tmp_path):
+    report = tmp_path / "report.json"
+    write_codeclimate(report, {"foo.f90": make_log(SOURCE, [0, 1])}, 0)
+    with open(report, encoding="utf-8") as fd:
+        issues = json.load(fd)
+    assert [issue["fingerprint"] for issue in issues] == fingerprints(make_log(SOURCE, [0, 1]))
+
+
+def test_apply_baseline(tmp_path):
+    report = tmp_path / "report.json"
+    write_codeclimate(report, {"foo.f90": make_log(SOURCE, [0])}, 0)
+
+    # The second copy of the line is numbered after the first, so is still new
+    error_log = make_log(SOURCE, [0, 1, 2])
+    removed = baseline.apply_baseline([error_log], baseline.load_fingerprints(report))
+    assert removed == 1
+    assert [err.start_point[0] for err in error_log] == [1, 2]
+
+
+def test_diff_reports():
+    old = {"a": {"fingerprint": "a"}, "b": {"fingerprint": "b"}}
+    new = {"b": {"fingerprint": "b"}, "c": {"fingerprint": "c"}}
+    diff = baseline.diff_reports(old, new)
+    assert diff.introduced == [{"fingerprint": "c"}]
+    assert diff.fixed == [{"fingerprint": "a"}]
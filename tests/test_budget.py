@@ -0,0 +1,97 @@
+# pylint: disable=W0621,C0116,C0114
+import os
+import pathlib
+import subprocess
+import time
+from multiprocessing.pool import ThreadPool
+from unittest import mock
+
+import pytest
+
+from castep_linter import budget, git_history, scan_files
+
+
+def git(repo: pathlib.Path, *args: str, date: str = "") -> None:
+    env = {**os.environ, "GIT_COMMITTER_DATE": date, "GIT_AUTHOR_DATE": date}
+    subprocess.run(  # noqa: S603
+        ["git", "-C", str(repo), *args],  # noqa: S607
+        capture_output=True,
+        check=True,
+        env=env,
+    )
+
+
+@pytest.fixture
+def repo(tmp_path: pathlib.Path) -> pathlib.Path:
+    git(tmp_path, "init", "-q")
+    git(tmp_path, "config", "user.email", "test@example.com")
+    git(tmp_path, "config", "user.name", "test")
+
+    for i, name in enumerate(["old.f90", "new.f90", "edited.f90"]):
+        (tmp_path / name).write_bytes(b"z = 1.0\n")
+        git(tmp_path, "add", name)
+        git(tmp_path, "commit", "-q", "-m", name, date=f"2020-01-0{i + 1}T00:00:00")
+
+    (tmp_path / "edited.f90").write_bytes(b"z = 2.0\n")
+    (tmp_path / "untracked.f90").write_bytes(b"z = 2.0\n")
+    return tmp_path
+
+
+def test_last_modified(repo: pathlib.Path):
+    files = [repo / name for name in ["old.f90", "new.f90", "edited.f90", "untracked.f90"]]
+    times = git_history.last_modified(files, repo)
+    assert times[files[0]] < times[files[1]]
+    assert times[files[2]] == times[files[3]] == float("inf")
+
+
+def test_prioritise(repo: pathlib.Path):
+    other = repo.parent / "outside.f90"
+    files = [other, repo / "old.f90", repo / "new.f90", repo / "edited.f90"]
+    order = budget.prioritise(files, {str(repo / "old.f90")}, repo)
+    assert order == [repo / "edited.f90", repo / "new.f90", repo / "old.f90", other]
+
+
+def test_prioritise_previous_errors(tmp_path: pathlib.Path):
+    files = [tmp_path / "a.f90", tmp_path / "b.f90"]
+    assert budget.prioritise(files, {str(files[1])}, tmp_path) == files[::-1]
+
+
+def test_run_within_budget():
+    def work(task: float) -> float:
+        time.sleep(task)
+        return task
+
+    not_started: list = []
+    with ThreadPool(1) as pool:
+        deadline = time.monotonic() + 0.15
+        results = list(
+            budget.run_within_budget(
+                pool, work, [0.1, 0.1, 0.1], processes=1, deadline=deadline, not_started=not_started
+            )
+        )
+    assert results == [0.1]
+    assert not_started == [0.1, 0.1]
+
+
+def test_run_within_budget_errors():
+    def work(_task: int) -> int:
+        raise ValueError
+
+    with ThreadPool(1) as pool, pytest.raises(ValueError):
+        list(
+            budget.run_within_budget(
+                pool, work, [1], processes=1, deadline=float("inf"), not_started=[]
+            )
+        )
+
+
+def test_files_not_started_reported(tmp_path: pathlib.Path):
+    files = [tmp_path / "a.f90", tmp_path / "b.f90"]
+    for file in files:
+        file.write_bytes(b"z = 1.0_dp\n")
+    report = tmp_path / "junit.xml"
+
+    argv = ["castep-lint", "-q", "--time-budget", "0", "-x", str(report), *map(str, files)]
+    with mock.patch("sys.argv", argv), pytest.raises(SystemExit):
+        scan_files.main()
+    assert all(str(file) in report.read_text() for file in files)
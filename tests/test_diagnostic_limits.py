@@ -0,0 +1,91 @@
+# pylint: disable=W0621,C0116,C0114
+from unittest import mock
+
+from castep_linter.error_logging import ErrorLogger
+from castep_linter.routine_cache import RoutineCache, ruleset_fingerprint, run_tests_cached
+from castep_linter.scan_files import merge_pieces, parse_args, run_tests_on_code
+from castep_linter.tests import CheckFunctionDict, check_number_literal
+from tests.conftest import Parser
+
+CODE = b"""subroutine a()
+  z = 1.0 + 2.0 + 3.0
+end subroutine a
+subroutine b()
+  z = 4.0
+end subroutine b
+"""
+
+TESTS: CheckFunctionDict = {"number_literal": [check_number_literal]}
+
+
+def test_logger_drops_after_max():
+    error_log = ErrorLogger("filename", max_errors=2)
+    for line in range(3):
+        error_log.add_msg_at("Error", (line, 0), (line, 1), "message")
+    assert len(error_log) == 2
+    assert error_log.truncated
+
+
+def test_logger_below_max_not_truncated():
+    error_log = ErrorLogger("filename", max_errors=2)
+    error_log.add_msg_at("Error", (0, 0), (0, 1), "message")
+    assert not error_log.full
+    assert not error_log.truncated
+
+
+def test_scan_stops_early(parse: Parser):
+    error_log = run_tests_on_code(parse(CODE), TESTS, "filename", max_errors=2)
+    assert [err.start_point for err in error_log] == [(1, 6), (1, 12)]
+    assert error_log.truncated
+
+
+def test_batched_stops(parse: Parser):
+    with mock.patch(
+        "castep_linter.tests.number_literal_correct_kind.node_factory.wrap_node"
+    ) as wrap_node:
+        run_tests_on_code(parse(CODE), TESTS, "filename", max_errors=0)
+    wrap_node.assert_not_called()
+
+
+def test_merge_pieces_truncates():
+    pieces = [ErrorLogger("filename", max_errors=2) for _ in range(2)]
+    for i, piece in enumerate(pieces):
+        piece.add_msg_at("Error", (i, 0), (i, 1), "message")
+        piece.add_msg_at("Error", (i + 2, 0), (i + 2, 1), "message")
+
+    (merged,) = merge_pieces(pieces)
+    assert [err.start_point[0] for err in merged] == [0, 1]
+    assert merged.truncated
+
+
+def test_merge_pieces_keeps_later_truncation():
+    pieces = [ErrorLogger("filename", max_errors=2) for _ in range(2)]
+    pieces[0].add_msg_at("Error", (0, 0), (0, 1), "message")
+    # The second piece stopped scanning early, though the merged log is not over the cap
+    pieces[1].add_msg_at("Error", (5, 0), (5, 1), "message")
+    pieces[1].truncated = True
+
+    (merged,) = merge_pieces(pieces)
+    assert len(merged) == 2
+    assert merged.truncated
+
+
+def test_cache_skips_incomplete_routines(parse: Parser, tmp_path):
+    cache = RoutineCache(tmp_path, "foo.f90", ruleset_fingerprint(TESTS))
+    error_log = run_tests_cached(parse(CODE), TESTS, "foo.f90", cache, max_errors=2)
+    cache.save()
+    assert len(error_log) == 2
+    assert error_log.truncated
+
+    cache = RoutineCache(tmp_path, "foo.f90", ruleset_fingerprint(TESTS))
+    error_log = run_tests_cached(parse(CODE), TESTS, "foo.f90", cache)
+    assert len(error_log) == 4
+    assert cache.hits == 0
+
+
+def test_fail_fast_implies_one_diagnostic(tmp_path):
+    source = tmp_path / "a.f90"
+    source.write_bytes(CODE)
+    with mock.patch("sys.argv", ["castep-lint", "--fail-fast", str(source)]):
+        args = parse_args()
+    assert args.max_diagnostics == 1
@@ -0,0 +1,56 @@
+# pylint: disable=W0621,C0116,C0114
+from unittest import mock
+
+from castep_linter.error_logging import ErrorLogger
+from castep_linter.scan_files import run_tests_on_code
+from castep_linter.tests import check_allocate_has_stat, check_complex_has_dp, test_list
+from castep_linter.tests.dispatch import DispatchTable, callee_name
+from castep_linter.tests.rule_info import rule
+from tests.conftest import Parser
+
+
+def find_node(parse: Parser, code: bytes, node_type: str):
+    tree = parse(code)
+    return next(node for node in tree.walk_raw() if node.type == node_type)
+
+
+def test_callee_name(parse: Parser):
+    assert callee_name(find_node(parse, b"y = CMPLX(a, b)", "call_expression")) == b"cmplx"
+    assert (
+        callee_name(find_node(parse, b"call Trace_Entry(x)", "subroutine_call")) == b"trace_entry"
+    )
+
+
+def test_dispatch_by_callee(parse: Parser):
+    table = DispatchTable(test_list)
+    cmplx = find_node(parse, b"y = cmplx(a, b)", "call_expression")
+    allocate = find_node(parse, b"allocate(x(3))", "call_expression")
+    other = find_node(parse, b"y = f(a, b)", "call_expression")
+
+    assert table.tests_for(cmplx) == [check_complex_has_dp]
+    assert table.tests_for(allocate) == [check_allocate_has_stat]
+    assert table.tests_for(other) == []
+
+
+def test_other_calls_not_wrapped(parse: Parser):
+    with mock.patch("castep_linter.tests.dispatch.node_factory.wrap_node") as wrap_node:
+        run_tests_on_code(parse(b"y = f(g(a), h(b))"), test_list, "filename")
+    wrap_node.assert_not_called()
+
+
+def test_generic_call_tests_kept_in_order(parse: Parser):
+    calls = []
+
+    @rule("UNKNOWN")
+    def any_call(node, _error_log):
+        calls.append(("any", node.name))
+
+    @rule("UNKNOWN", callees=["cmplx"])
+    def cmplx_call(node, _error_log):
+        calls.append(("cmplx", node.name))
+
+    table = DispatchTable({"call_expression": [any_call, cmplx_call]})
+    for code in [b"y = cmplx(a)", b"y = f(a)"]:
+        table.run_tests(find_node(parse, code, "call_expression"), ErrorLogger("filename"))
+
+    assert calls == [("any", "cmplx"), ("cmplx", "cmplx"), ("any", "f")]
@@ -0,0 +1,85 @@
+# pylint: disable=W0621,C0116,C0114
+import pathlib
+import subprocess
+
+import pytest
+
+from castep_linter import git_history
+from castep_linter.scan_files import history_main, scan_blob
+
+
+def git(repo: pathlib.Path, *args: str) -> str:
+    return subprocess.run(  # noqa: S603
+        ["git", "-C", str(repo), *args], capture_output=True, check=True, text=True  # noqa: S607
+    ).stdout.strip()
+
+
+@pytest.fixture
+def repo(tmp_path: pathlib.Path) -> pathlib.Path:
+    git(tmp_path, "init", "-q")
+    git(tmp_path, "config", "user.email", "test@example.com")
+    git(tmp_path, "config", "user.name", "test")
+
+    (tmp_path / "a.f90").write_bytes(b"z = 1.0\n")
+    (tmp_path / "README").write_bytes(b"not fortran\n")
+    git(tmp_path, "add", ".")
+    git(tmp_path, "commit", "-q", "-m", "first")
+
+    (tmp_path / "b.F90").write_bytes(b"z = 1.0_dp\n")
+    git(tmp_path, "add", ".")
+    git(tmp_path, "commit", "-q", "-m", "second")
+    return tmp_path
+
+
+def test_expand_range(repo: pathlib.Path):
+    revs = git_history.expand_revisions(["HEAD~1..HEAD"], repo)
+    assert revs == [git(repo, "rev-parse", "HEAD")]
+
+
+def test_expand_single_revisions(repo: pathlib.Path):
+    revs = git_history.expand_revisions(["HEAD~1", "HEAD"], repo)
+    assert revs == [git(repo, "rev-parse", "HEAD~1"), git(repo, "rev-parse", "HEAD")]
+
+
+def test_expand_bad_revision(repo: pathlib.Path):
+    with pytest.raises(git_history.GitError):
+        git_history.expand_revisions(["no_such_rev"], repo)
+
+
+def test_list_fortran_blobs(repo: pathlib.Path):
+    first = git_history.list_fortran_blobs("HEAD~1", repo)
+    second = git_history.list_fortran_blobs("HEAD", repo)
+    assert set(first) == {"a.f90"}
+    assert set(second) == {"a.f90", "b.F90"}
+    assert first["a.f90"] == second["a.f90"]
+
+
+def test_read_and_scan_blobs(repo: pathlib.Path):
+    tree = git_history.list_fortran_blobs("HEAD", repo)
+    blobs = dict(git_history.read_blobs(sorted(set(tree.values())), repo))
+    assert blobs[tree["a.f90"]] == b"z = 1.0\n"
+
+    _, counts = scan_blob((tree["a.f90"], blobs[tree["a.f90"]]))
+    assert counts["Error"] == 1
+    _, counts = scan_blob((tree["b.F90"], blobs[tree["b.F90"]]))
+    assert counts["Error"] == 0
+
+
+def test_history_labels(repo: pathlib.Path, capsys):
+    head = git(repo, "rev-parse", "HEAD")
+    with pytest.raises(SystemExit) as exc:
+        history_main(["-C", str(repo), "HEAD~1", "HEAD~1..HEAD"])
+    assert exc.value.code == 0
+    rows = capsys.readouterr().out
+    assert "HEAD~1" in rows
+    assert head[:12] in rows
+    assert head[:13] not in rows
+
+
+def test_history_missing_blob(repo: pathlib.Path, capsys):
+    sha = git(repo, "rev-parse", "HEAD:a.f90")
+    (repo / ".git" / "objects" / sha[:2] / sha[2:]).unlink()
+    with pytest.raises(SystemExit) as exc:
+        history_main(["-C", str(repo), "HEAD"])
+    assert exc.value.code == 2
+    assert sha in capsys.readouterr().out
@@ -0,0 +1,105 @@
+# pylint: disable=W0621,C0116,C0114
+import json
+import pathlib
+from unittest import mock
+
+import pytest
+
+from castep_linter import scan_files, storage
+from castep_linter.error_logging import ErrorLogger
+from castep_linter.journal import Journal
+from castep_linter.scan_files import completed_files
+
+SETTINGS = {"level": "Info", "rules": None}
+
+
+def make_log(filename: str, lines: list[int]) -> ErrorLogger:
+    error_log = ErrorLogger(filename)
+    for line in lines:
+        error_log.add_msg_at("Error", (line, 0), (line, 1), "message")
+    return error_log
+
+
+def write_journal(file: pathlib.Path) -> None:
+    with Journal(file, SETTINGS) as journal:
+        journal.record(make_log("a.f90", [1, 2]), "hash_a")
+        journal.record(make_log("b.f90", []), "hash_b")
+
+
+def test_resume(tmp_path):
+    file = tmp_path / "journal.jsonl"
+    write_journal(file)
+
+    with Journal(file, SETTINGS, resume=True) as journal:
+        error_log = journal.lookup("a.f90", "hash_a")
+        assert error_log is not None
+        assert [err.start_point for err in error_log] == [(1, 0), (2, 0)]
+        assert journal.lookup("a.f90", "changed") is None
+        assert journal.lookup("c.f90", "hash_c") is None
+
+
+def test_without_resume_restarts(tmp_path):
+    file = tmp_path / "journal.jsonl"
+    write_journal(file)
+
+    with Journal(file, SETTINGS) as journal:
+        assert journal.lookup("a.f90", "hash_a") is None
+    assert len(file.read_text().splitlines()) == 1
+
+
+def test_other_settings_restarts(tmp_path):
+    file = tmp_path / "journal.jsonl"
+    write_journal(file)
+
+    with Journal(file, {**SETTINGS, "level": "Error"}, resume=True) as journal:
+        assert journal.lookup("a.f90", "hash_a") is None
+
+
+def test_partial_write_dropped(tmp_path):
+    file = tmp_path / "journal.jsonl"
+    write_journal(file)
+    with file.open("a", encoding="utf-8") as fd:
+        fd.write('{"file": "c.f90", "ha')
+
+    with Journal(file, SETTINGS, resume=True) as journal:
+        assert journal.lookup("b.f90", "hash_b") is not None
+        journal.record(make_log("c.f90", [3]), "hash_c")
+
+    with Journal(file, SETTINGS, resume=True) as journal:
+        assert journal.lookup("a.f90", "hash_a") is not None
+        assert journal.lookup("c.f90", "hash_c") is not None
+
+
+def test_completed_files():
+    tasks = [
+        (pathlib.Path("a.f90"), None),
+        (pathlib.Path("b.f90"), None),
+        (pathlib.Path("b.f90"), None),
+    ]
+    results = completed_files(
+        iter([make_log("b.f90", [5]), make_log("a.f90", [1]), make_log("b.f90", [2])]), tasks
+    )
+    assert [(log.filename, [e.start_point[0] for e in log]) for log in results] == [
+        ("a.f90", [1]),
+        ("b.f90", [2, 5]),
+    ]
+
+
+def run_main(argv: list[str]) -> None:
+    with mock.patch("sys.argv", ["castep-lint", "-q", *argv]), pytest.raises(SystemExit):
+        scan_files.main()
+
+
+def test_digest_taken_in_worker(tmp_path):
+    source = tmp_path / "a.f90"
+    source.write_bytes(b"z = 1.0\n")
+    file = tmp_path / "journal.jsonl"
+
+    # A fresh scan does not read the files to hash them before scanning them
+    with mock.patch.object(storage, "file_digest", side_effect=AssertionError):
+        run_main(["--journal", str(file), str(source)])
+    _, record = [json.loads(line) for line in file.read_text().splitlines()]
+    assert record["hash"] == storage.source_digest(b"z = 1.0\n")
+
+    with mock.patch.object(scan_files, "scan_file", side_effect=AssertionError):
+        run_main(["--journal", str(file), "--resume", str(source)])
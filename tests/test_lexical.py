@@ -0,0 +1,83 @@
+# pylint: disable=W0621,C0116,C0114
+import argparse
+from unittest import mock
+
+import pytest
+
+from castep_linter.error_logging import ErrorLogger
+from castep_linter.linter import Linter
+from castep_linter.scan_files import rule_types, scan_source
+from castep_linter.tests import (
+    check_dos_line_endings,
+    check_tabs,
+    check_trailing_whitespace,
+    select_tests,
+)
+from castep_linter.tests.lexical import LineIndex
+
+
+def run(test, code: bytes) -> ErrorLogger:
+    error_log = ErrorLogger("filename")
+    test(code, error_log)
+    return error_log
+
+
+def test_line_index():
+    index = LineIndex(b"ab\ncd\n\nef")
+    assert index.point(0) == (0, 0)
+    assert index.point(4) == (1, 1)
+    assert index.point(6) == (2, 0)
+    assert index.point(8) == (3, 1)
+
+
+def test_no_tabs():
+    assert len(run(check_tabs, b"z = 1\n  y = 2\n")) == 0
+
+
+def test_tabs():
+    error_log = run(check_tabs, b"z = 1\n\t\ty = 2\nx =\t3\n")
+    assert len(error_log) == 2
+    assert error_log.errors[0].start_point == (1, 0)
+    assert error_log.errors[0].end_point == (1, 2)
+    assert error_log.errors[1].start_point == (2, 3)
+
+
+def test_unix_line_endings():
+    assert len(run(check_dos_line_endings, b"z = 1\ny = 2\n")) == 0
+
+
+def test_dos_line_endings_reported_once():
+    error_log = run(check_dos_line_endings, b"z = 1\r\ny = 2\r\n")
+    assert len(error_log) == 1
+    assert error_log.errors[0].start_point == (0, 5)
+
+
+def test_trailing_whitespace():
+    error_log = run(check_trailing_whitespace, b"z = 1  \ny = 2\r\nx = 3 \r\nw = 4 ")
+    assert [e.start_point for e in error_log] == [(0, 5), (2, 5), (3, 5)]
+
+
+def test_select_tests():
+    tests, lexical_tests = select_tests({"TABS", "ALLOC"})
+    assert list(tests) == ["call_expression"]
+    assert lexical_tests == [check_tabs]
+
+
+def test_unknown_rule_type():
+    with pytest.raises(argparse.ArgumentTypeError):
+        rule_types("tabs,lemon")
+
+
+def test_lexical_only_skips_parse():
+    args = Linter(rules=["TABS"]).args
+    with mock.patch("castep_linter.scan_files.parser.FortranTree") as tree:
+        error_log = scan_source("filename", b"\tz = 1.0\n", args)
+    tree.assert_not_called()
+    assert len(error_log) == 1
+
+
+def test_lexical_merged_before_cap():
+    args = Linter(rules=["TABS", "LITERAL_KIND"], max_diagnostics=2).args
+    error_log = scan_source("filename", b"z = 1.0\n\ty = 2\nx = 3.0\n", args)
+    assert [err.start_point[0] for err in error_log] == [0, 1]
+    assert error_log.truncated
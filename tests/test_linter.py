@@ -0,0 +1,67 @@
+# pylint: disable=W0621,C0116,C0114
+import asyncio
+import pathlib
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from castep_linter.linter import Linter
+
+SOURCE = b"""subroutine foo()
+  real :: x
+  x = 1.0
+end subroutine foo
+"""
+
+
+@pytest.fixture
+def files(tmp_path: pathlib.Path) -> list:
+    paths = []
+    for name, text in [("a.f90", SOURCE), ("b.f90", b"x = 1\n"), ("c.f90", SOURCE + b"\tx = 1\n")]:
+        (tmp_path / name).write_bytes(text)
+        paths.append(tmp_path / name)
+    return paths
+
+
+def test_lint_bytes():
+    error_log = Linter().lint_bytes(SOURCE, "foo.f90")
+    assert error_log.filename == "foo.f90"
+    assert error_log.source == SOURCE
+    assert {err.message for err in error_log.errors} >= {"Float literal without kind"}
+
+
+def test_settings():
+    error_log = Linter(rules=["literal_kind"]).lint_bytes(SOURCE)
+    assert [err.message for err in error_log.errors] == ["Float literal without kind"]
+    assert Linter(level="Error").lint_bytes(SOURCE).count_errors()["Info"] == 0
+    assert len(Linter(max_diagnostics=1).lint_bytes(SOURCE).errors) == 1
+
+
+@pytest.mark.parametrize("kwargs", [{"rules": ["NOT_A_RULE"]}, {"level": "Loud"}])
+def test_bad_settings(kwargs):
+    with pytest.raises(ValueError, match="Unknown"):
+        Linter(**kwargs)
+
+
+def test_lint_paths(files):
+    linter = Linter()
+    serial = {log.filename: len(log.errors) for log in linter.lint_paths(files)}
+    assert list(serial) == [str(file) for file in files]
+    assert serial[str(files[1])] == 0
+    assert serial[str(files[2])] == serial[str(files[0])] + 1
+
+    with ThreadPoolExecutor(2) as executor:
+        linter = Linter(executor=executor)
+        assert {log.filename: len(log.errors) for log in linter.lint_paths(files)} == serial
+
+
+def test_async(files):
+    async def run():
+        linter = Linter()
+        error_log = await linter.lint_bytes_async(SOURCE, "foo.f90")
+        results = {log.filename: len(log.errors) async for log in linter.lint_paths_async(files)}
+        return error_log, results
+
+    error_log, results = asyncio.run(run())
+    assert len(error_log.errors) == len(Linter().lint_bytes(SOURCE).errors)
+    assert results == {log.filename: len(log.errors) for log in Linter().lint_paths(files)}
@@ -0,0 +1,44 @@
+# pylint: disable=W0621,C0116,C0114
+import json
+
+from castep_linter.error_logging import ERROR_SEVERITY, ErrorLogger
+from castep_linter.error_logging.ndjson_writer import NdjsonWriter
+
+SOURCE = b"z = 1.0\n\ty = 2.0_dp\n"
+
+
+def make_log() -> ErrorLogger:
+    error_log = ErrorLogger("foo.f90", source=SOURCE)
+    error_log.add_msg_at("Error", (0, 4), (0, 7), "Float literal without kind")
+    error_log.add_msg_at("Warning", (1, 0), (1, 1), "Tab character in source")
+    return error_log
+
+
+def read_records(file) -> list:
+    with open(file, encoding="utf-8") as fd:
+        return [json.loads(line) for line in fd]
+
+
+def test_records(tmp_path):
+    file = tmp_path / "out.ndjson"
+    with NdjsonWriter(file, ERROR_SEVERITY["Info"]) as writer:
+        writer.write_log(make_log())
+
+    records = read_records(file)
+    assert [r["rule"] for r in records] == ["LITERAL_KIND", "TABS"]
+    assert records[0]["path"] == "foo.f90"
+    assert records[0]["severity"] == "Error"
+    assert records[0]["pos"] == [0, 4, 0, 7]
+    assert len(records[0]["fingerprint"]) == 40
+    assert " " not in file.read_text().split('"message"')[0]
+
+
+def test_level_and_append(tmp_path):
+    file = tmp_path / "out.ndjson"
+    for _ in range(2):
+        with NdjsonWriter(file, ERROR_SEVERITY["Error"]) as writer:
+            writer.write_log(make_log())
+
+    records = read_records(file)
+    assert [r["severity"] for r in records] == ["Error", "Error"]
+    assert records[0]["fingerprint"] == records[1]["fingerprint"]
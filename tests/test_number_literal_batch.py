@@ -0,0 +1,109 @@
+# pylint: disable=W0621,C0116,C0114
+import pathlib
+from unittest import mock
+
+import pytest
+
+from castep_linter.error_logging import ErrorLogger
+from castep_linter.routine_cache import RoutineCache, ruleset_fingerprint, run_tests_cached
+from castep_linter.scan_files import run_tests_on_code
+from castep_linter.tests import check_number_literal, test_list
+from castep_linter.tests.dispatch import DispatchTable
+from castep_linter.tests.number_literal_correct_kind import check_number_literals
+from tests.conftest import Parser
+
+LITERALS = [
+    b"1",
+    b"1_int32",
+    b"1_INT64",
+    b"1_dp",
+    b"1_sp",
+    b"1.0",
+    b"1.",
+    b"1.0_dp",
+    b"1.0_DP",
+    b"1.0_di_dp",
+    b"1.0_version_kind",
+    b"1.0_sp",
+    b"1.0e5",
+    b"1.0E5_dp",
+    b"1.0d5",
+    b"1D0",
+    b"1e5_int32",
+]
+
+
+def per_node(parse: Parser, code: bytes) -> list:
+    tree = parse(code)
+    error_log = ErrorLogger("filename")
+    for node in tree.walk():
+        if node.type == "number_literal":
+            check_number_literal(node, error_log)
+    return [(e.message, e.start_point) for e in error_log]
+
+
+def batched(parse: Parser, code: bytes) -> list:
+    tree = parse(code)
+    error_log = ErrorLogger("filename")
+    check_number_literals(tree, tree.tree.root_node, error_log)
+    return [(e.message, e.start_point) for e in error_log]
+
+
+@pytest.mark.parametrize("literal", LITERALS)
+def test_batch_matches_per_node(parse: Parser, literal: bytes):
+    code = b"z = " + literal
+    assert batched(parse, code) == per_node(parse, code)
+
+
+def test_batch_in_source_order(parse: Parser):
+    code = b"z = 1.0 + 2 + 3.0e5 + f(4.0_sp)\ny = 5.0"
+    assert batched(parse, code) == per_node(parse, code)
+    assert len(batched(parse, code)) == 4
+
+
+def test_valid_literals_not_wrapped(parse: Parser):
+    with mock.patch("castep_linter.tests.number_literal_correct_kind.node_factory") as factory:
+        error_log = run_tests_on_code(
+            parse(b"z = 1.0_dp + 2 + 3d0"), {"number_literal": [check_number_literal]}, "file"
+        )
+    factory.wrap_node.assert_not_called()
+    assert len(error_log) == 0
+
+
+MIXED = b"""module m
+contains
+subroutine a(x)
+  real :: x = 1.0
+  complex(kind=dp) :: c
+  allocate(y(2))
+  c = complex(x, 2.0)
+  x = 3.0
+end subroutine a
+end module m
+"""
+
+
+def unbatched(parse: Parser, code: bytes) -> list:
+    tree = parse(code)
+    error_log = ErrorLogger("filename")
+    table = DispatchTable(test_list, batched=False)
+    for node in tree.walk_raw():
+        table.run_tests(node, error_log)
+    return [(e.message, e.start_point) for e in error_log]
+
+
+def test_mixed_rules_in_source_order(parse: Parser, tmp_path: pathlib.Path):
+    expected = unbatched(parse, MIXED)
+    assert len({message for message, _ in expected}) > 1
+
+    error_log = run_tests_on_code(parse(MIXED), test_list, "filename")
+    assert [(e.message, e.start_point) for e in error_log] == expected
+
+    error_log = run_tests_on_code(parse(MIXED), test_list, "filename", max_errors=3)
+    assert [(e.message, e.start_point) for e in error_log] == expected[:3]
+
+    for _ in range(2):
+        cache = RoutineCache(tmp_path, "filename", ruleset_fingerprint(test_list))
+        error_log = run_tests_cached(parse(MIXED), test_list, "filename", cache)
+        cache.save()
+        assert [(e.message, e.start_point) for e in error_log] == expected
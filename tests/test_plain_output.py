@@ -0,0 +1,55 @@
+# pylint: disable=W0621,C0116,C0114
+import io
+from unittest import mock
+
+import pytest
+from rich.console import Console
+
+from castep_linter.error_logging import ErrorLogger
+from castep_linter.error_logging.error_types import PrintStyle
+from castep_linter.scan_files import write_plain
+
+SOURCE = b"z = 1.0\n\ty = 2.0_dp\nx = [1.0, 2.0]\n"
+
+
+def make_log() -> ErrorLogger:
+    error_log = ErrorLogger("foo.f90", source=SOURCE)
+    error_log.add_msg_at("Error", (0, 4), (0, 7), "Float literal without kind")
+    error_log.add_msg_at("Warning", (1, 0), (1, 1), "Tab character in source")
+    error_log.add_msg_at("Info", (2, 5), (2, 8), "Something else")
+    return error_log
+
+
+@pytest.mark.parametrize("print_style", list(PrintStyle))
+def test_matches_rich(print_style: PrintStyle):
+    error_log = make_log()
+    out = io.StringIO()
+    console = Console(file=out, soft_wrap=True, markup=False, highlight=False)
+    error_log.print_errors(console, level="Warn", print_style=print_style)
+
+    assert error_log.format_errors("Warn", print_style=print_style) == out.getvalue()
+
+
+def test_nothing_to_format():
+    error_log = make_log()
+    with mock.patch("builtins.open") as mock_open:
+        assert ErrorLogger("foo.f90").format_errors("Info") == ""
+    mock_open.assert_not_called()
+    assert error_log.format_errors("Error", print_style=PrintStyle.GCC).count("\n") == 1
+
+
+def test_source_read_once(tmp_path):
+    file = tmp_path / "foo.f90"
+    file.write_bytes(SOURCE)
+    error_log = make_log()
+    error_log.filename = str(file)
+    error_log.source = None
+
+    with mock.patch("builtins.open", wraps=open) as mock_open:
+        error_log.format_errors("Info")
+    assert mock_open.call_count == 1
+
+
+def test_write_plain(capsysbinary):
+    write_plain("a\nb\n")
+    assert capsysbinary.readouterr().out == b"a\nb\n"
@@ -0,0 +1,58 @@
+# pylint: disable=W0621,C0116,C0114
+import pathlib
+import threading
+import time
+from unittest import mock
+
+from castep_linter import prefetch, scan_files
+from castep_linter.linter import Linter
+
+
+def test_prefetch_depth(tmp_path: pathlib.Path):
+    files = [tmp_path / f"{i}.f90" for i in range(5)]
+    warmed = []
+    two_warmed = threading.Event()
+    three_warmed = threading.Event()
+
+    def _warm(file):
+        warmed.append(file)
+        (two_warmed if len(warmed) == 2 else three_warmed).set()
+
+    with mock.patch.object(prefetch, "warm", side_effect=_warm):
+        with prefetch.Prefetcher(files, 2) as prefetcher:
+            assert two_warmed.wait(5)
+            # Nothing has been scanned yet, so it must not read further ahead
+            time.sleep(0.05)
+            assert warmed == files[:2]
+            three_warmed.clear()
+            prefetcher.done()
+            assert three_warmed.wait(5)
+            assert warmed == files[:3]
+
+
+def test_prefetch_disabled(tmp_path: pathlib.Path):
+    with mock.patch.object(prefetch, "warm") as warm:
+        with prefetch.Prefetcher([tmp_path / "a.f90"], 0) as prefetcher:
+            prefetcher.done()
+    warm.assert_not_called()
+
+
+def test_warm(tmp_path: pathlib.Path):
+    file = tmp_path / "a.f90"
+    file.write_bytes(b"x = 1.0\n")
+    prefetch.warm(file)
+    prefetch.warm(tmp_path / "missing.f90")
+
+
+def test_source_kept_for_context(tmp_path: pathlib.Path):
+    args = Linter().args
+    file = tmp_path / "a.f90"
+    file.write_bytes(b"x = 1.0\n")
+    error_log = scan_files.scan_file(file, args)
+    assert error_log.source == b"x = 1.0\n"
+
+    with mock.patch("builtins.open", side_effect=AssertionError):
+        assert "x = 1.0" in error_log.format_errors("Info")
+
+    file.write_bytes(b"x = 1\n")
+    assert scan_files.scan_file(file, args).source is None
@@ -0,0 +1,46 @@
+# pylint: disable=W0621,C0116,C0114
+from unittest import mock
+
+from castep_linter.linter import Linter
+from castep_linter.scan_files import scan_source
+from castep_linter.tests import (
+    check_allocate_has_stat,
+    check_complex_has_dp,
+    check_number_literal,
+    test_list,
+)
+from castep_linter.tests.prefilter import active_tests, find_tokens
+
+
+def test_find_tokens_case_insensitive():
+    found = find_tokens(
+        b"x = CMPLX(a, b)\nALLOCATE(y)", frozenset({b"cmplx", b"allocate", b"real"})
+    )
+    assert found == {b"cmplx", b"allocate"}
+
+
+def test_find_tokens_inside_longer_token():
+    found = find_tokens(b"realloc", frozenset({b"real", b"realloc"}))
+    assert found == {b"real", b"realloc"}
+
+
+def test_active_tests_pruned():
+    tests = active_tests(b"y = cmplx(a, b)", test_list)
+    assert tests["call_expression"] == [check_complex_has_dp]
+    assert "subroutine" not in tests
+    assert "variable_declaration" not in tests
+    # Tests without trigger tokens are always active
+    assert tests["number_literal"] == [check_number_literal]
+
+
+def test_active_tests_all_present():
+    tests = active_tests(b"allocate(x, stat=y)\nz = cmplx(a, b, dp)", test_list)
+    assert tests["call_expression"] == [check_complex_has_dp, check_allocate_has_stat]
+
+
+def test_no_active_tests_skips_parse():
+    args = Linter(rules=["ALLOC"]).args
+    with mock.patch("castep_linter.scan_files.parser.FortranTree") as tree:
+        error_log = scan_source("filename", b"z = 1.0_dp\n", args)
+    tree.assert_not_called()
+    assert len(error_log) == 0
@@ -0,0 +1,120 @@
+# pylint: disable=W0621,C0116,C0114
+import argparse
+import pathlib
+import shutil
+from unittest import mock
+
+import pytest
+
+from castep_linter import preprocess, scan_files
+from castep_linter.error_logging.error_types import fortran_error_class
+from castep_linter.linter import Linter
+
+SOURCE = b"""module m
+#include "inc.h"
+#ifdef MPI
+  real :: a = 1.0
+#else
+  real :: b = 2.0
+#endif
+  real :: y = 3.0
+end module m
+"""
+
+needs_cpp = pytest.mark.skipif(shutil.which("cpp") is None, reason="cpp is not installed")
+
+
+def test_split_line_markers():
+    output = b'# 1 "<stdin>"\nmodule m\n# 1 "inc.h" 1\ninclude\n# 3 "<stdin>" 2\n\nend\n'
+    text, lines = preprocess.split_line_markers(output)
+    assert text == b"module m\ninclude\n\nend\n"
+    assert lines == [0, None, 2, 3]
+
+
+def test_map_errors():
+    variant = preprocess.Variant("MPI", b"", [0, None, 4])
+    error = fortran_error_class("Error")
+    errors = [
+        error.at((0, 1), (2, 3), "spans"),
+        error.at((1, 0), (1, 5), "included"),
+        error.at((2, 2), (2, 4), "moved"),
+    ]
+    mapped = list(variant.map_errors(errors))
+    assert [(err.start_point, err.end_point, err.message) for err in mapped] == [
+        ((0, 1), (4, 3), "spans"),
+        ((4, 2), (4, 4), "moved"),
+    ]
+
+
+def test_cpp_defines():
+    assert scan_files.cpp_defines("") == ()
+    assert scan_files.cpp_defines("MPI, DEBUG=1") == ("MPI", "DEBUG=1")
+    with pytest.raises(argparse.ArgumentTypeError):
+        scan_files.cpp_defines("MPI,1BAD")
+
+
+@needs_cpp
+def test_variants_deduplicated_and_cached(tmp_path: pathlib.Path):
+    (tmp_path / "inc.h").write_bytes(b"integer :: from_inc\n")
+    filename = str(tmp_path / "m.F90")
+    variants = [(), ("MPI",), ("MPI", "UNUSED=1")]
+
+    distinct = preprocess.preprocess_variants(filename, SOURCE, variants, cache_dir=tmp_path / "c")
+    assert [variant.name for variant in distinct] == ["", "MPI"]
+    assert b"from_inc" in distinct[0].text
+    assert b"real :: a" in distinct[1].text
+    assert b"real :: a" not in distinct[0].text
+
+    with mock.patch.object(preprocess, "run_cpp", side_effect=AssertionError):
+        cached = preprocess.preprocess_variants(
+            filename, SOURCE, variants, cache_dir=tmp_path / "c"
+        )
+    assert cached == distinct
+
+
+def test_failed_cpp_uses_source(caplog):
+    with mock.patch.object(preprocess, "run_cpp", side_effect=OSError("no cpp")):
+        (variant,) = preprocess.preprocess_variants("m.F90", SOURCE, [()])
+    assert variant.text == SOURCE
+    assert variant.lines == list(range(9))
+    assert "no cpp" in caplog.text
+
+
+@needs_cpp
+def test_scan_variants(tmp_path: pathlib.Path):
+    (tmp_path / "inc.h").write_bytes(b"real :: from_inc = 4.0\n")
+    filename = str(tmp_path / "m.F90")
+    plain = Linter(rules=["literal_kind"]).lint_bytes(SOURCE, filename)
+    linter = Linter(rules=["literal_kind"], cpp_variants=[(), ("MPI",)])
+    error_log = linter.lint_bytes(SOURCE, filename)
+
+    # Both branches are scanned, issues outside them are only reported once and
+    # those in the included file are not reported against this one
+    assert sorted(err.start_point for err in error_log.errors) == sorted(
+        err.start_point for err in plain.errors
+    )
+    assert [err.start_point[0] for err in error_log.errors] == [3, 5, 7]
+
+    # Without directives the source is scanned as it is
+    with mock.patch.object(preprocess, "run_cpp", side_effect=AssertionError):
+        assert linter.lint_bytes(b"real :: x = 1.0\n").errors
+
+
+@needs_cpp
+def test_cache_checks_included_files(tmp_path: pathlib.Path):
+    source = b'#include "inc.h"\n#ifdef USE_DP\nreal(kind=dp) :: x\n#else\nreal :: x\n#endif\n'
+    filename = str(tmp_path / "m.F90")
+    (tmp_path / "inc.h").write_bytes(b"#define USE_DP\n")
+    (variant,) = preprocess.preprocess_variants(filename, source, [()], cache_dir=tmp_path / "c")
+    assert b"kind=dp" in variant.text
+
+    (tmp_path / "inc.h").write_bytes(b"")
+    (variant,) = preprocess.preprocess_variants(filename, source, [()], cache_dir=tmp_path / "c")
+    assert b"kind=dp" not in variant.text
+
+    (tmp_path / "inc.h").unlink()
+    with mock.patch.object(preprocess, "run_cpp", side_effect=OSError("no cpp")):
+        (variant,) = preprocess.preprocess_variants(
+            filename, source, [()], cache_dir=tmp_path / "c"
+        )
+    assert variant.text == source
@@ -0,0 +1,88 @@
+# pylint: disable=W0621,C0116,C0114
+import pathlib
+from unittest import mock
+
+import pytest
+
+from castep_linter.routine_cache import RoutineCache, ruleset_fingerprint, run_tests_cached
+from castep_linter.scan_files import run_tests_on_code
+from castep_linter.tests import CheckFunctionDict, check_number_literal, check_trace_entry_exit
+from tests.conftest import Parser
+
+CODE = b"""module foo
+contains
+subroutine a()
+  z = 1.0
+end subroutine a
+subroutine b()
+  z = 2.0
+end subroutine b
+end module foo
+"""
+
+
+@pytest.fixture
+def test_list() -> CheckFunctionDict:
+    return {
+        "subroutine": [check_trace_entry_exit],
+        "number_literal": [check_number_literal],
+    }
+
+
+def lint(parse: Parser, code: bytes, test_list: CheckFunctionDict, cache_dir: pathlib.Path):
+    cache = RoutineCache(cache_dir, "foo.f90", ruleset_fingerprint(test_list))
+    error_log = run_tests_cached(parse(code), test_list, "foo.f90", cache)
+    cache.save()
+    return error_log, cache
+
+
+def positions(error_log):
+    return sorted((e.message, tuple(e.start_point), tuple(e.end_point)) for e in error_log)
+
+
+def test_cache_matches_uncached(
+    parse: Parser, test_list: CheckFunctionDict, tmp_path: pathlib.Path
+):
+    expected = run_tests_on_code(parse(CODE), test_list, "foo.f90")
+    first, _ = lint(parse, CODE, test_list, tmp_path)
+    second, cache = lint(parse, CODE, test_list, tmp_path)
+
+    assert positions(first) == positions(expected)
+    assert positions(second) == positions(expected)
+    assert cache.hits == 2
+    assert cache.misses == 0
+
+
+def test_cache_shifts_unchanged_routines(
+    parse: Parser, test_list: CheckFunctionDict, tmp_path: pathlib.Path
+):
+    lint(parse, CODE, test_list, tmp_path)
+
+    edited = CODE.replace(b"  z = 1.0\n", b"  z = 1.0_dp\n  y = 3.0_dp\n")
+    error_log, cache = lint(parse, edited, test_list, tmp_path)
+
+    assert cache.hits == 1
+    assert cache.misses == 1
+    assert positions(error_log) == positions(run_tests_on_code(parse(edited), test_list, "foo.f90"))
+
+
+def test_cache_only_reruns_changed_routines(
+    parse: Parser, test_list: CheckFunctionDict, tmp_path: pathlib.Path
+):
+    lint(parse, CODE, test_list, tmp_path)
+
+    counting_check = mock.Mock(wraps=check_number_literal, __qualname__="check_number_literal")
+    counting_check.__module__ = check_number_literal.__module__
+    counting_list: CheckFunctionDict = {**test_list, "number_literal": [counting_check]}
+
+    edited = CODE.replace(b"z = 2.0", b"z = 2.5")
+    lint(parse, edited, counting_list, tmp_path)
+    assert counting_check.call_count == 1
+
+
+def test_cache_discarded_for_other_rules(
+    parse: Parser, test_list: CheckFunctionDict, tmp_path: pathlib.Path
+):
+    lint(parse, CODE, test_list, tmp_path)
+    _, cache = lint(parse, CODE, {"number_literal": [check_number_literal]}, tmp_path)
+    assert cache.hits == 0
@@ -0,0 +1,40 @@
+# pylint: disable=W0621,C0116,C0114
+from unittest import mock
+
+from castep_linter.error_logging import ERROR_SEVERITY, ErrorLogger, error_types
+from castep_linter.scan_files import run_tests_on_code
+from castep_linter.tests import (
+    check_allocate_has_stat,
+    check_trace_entry_exit,
+    check_trailing_whitespace,
+    select_tests,
+    test_list,
+)
+from tests.conftest import CodeWrapper, Parser
+
+
+def test_add_msg_below_threshold_dropped():
+    error_log = ErrorLogger("filename", min_severity=ERROR_SEVERITY["Warn"])
+    with mock.patch.object(error_types.FortranInfo, "__init__", return_value=None) as init:
+        error_log.add_msg("Info", mock.Mock(), "message")
+    init.assert_not_called()
+    assert len(error_log) == 0
+
+    error_log.add_msg_at("Warning", (0, 0), (0, 1), "message")
+    assert len(error_log) == 1
+
+
+def test_select_tests_by_severity():
+    tests, lexical_tests = select_tests(min_severity=ERROR_SEVERITY["Warn"])
+    assert check_trailing_whitespace not in lexical_tests
+    assert check_allocate_has_stat in tests["call_expression"]
+
+    tests, _ = select_tests(min_severity=ERROR_SEVERITY["Error"])
+    # Trace checks can still report errors for incorrect names
+    assert tests["subroutine"] == [check_trace_entry_exit]
+
+
+def test_missing_trace_below_threshold(parse: Parser, subroutine_wrapper: CodeWrapper):
+    tree = parse(subroutine_wrapper(b"call trace_entry('y', stat)"))
+    error_log = run_tests_on_code(tree, test_list, "filename", ERROR_SEVERITY["Error"])
+    assert [e.message for e in error_log] == ["Incorrect name passed to trace in x"]
@@ -0,0 +1,61 @@
+# pylint: disable=W0621,C0116,C0114
+from castep_linter.fortran.parser import FortranTree
+from castep_linter.fortran.splitter import split_tree
+from castep_linter.scan_files import merge_pieces, run_tests_on_code
+from castep_linter.tests import test_list
+from tests.conftest import Parser
+
+CODE = b"""module foo
+  real(kind=dp) :: modvar = 1.0
+contains
+  subroutine a()
+    call trace_entry("a", stat)
+    z = 1.0
+    call trace_exit("a", stat)
+  end subroutine a
+
+  ! comment between routines
+  subroutine b()
+    allocate(x(3))
+  contains
+    function inner(q)
+      q = cmplx(1.0_dp, 2.0_dp)
+    end function inner
+  end subroutine b
+
+  function c(y)
+    real :: y
+  end function c
+end module foo
+"""
+
+
+def summary(error_log):
+    return sorted((e.message, tuple(e.start_point), tuple(e.end_point)) for e in error_log)
+
+
+def test_split_covers_routines(parse: Parser):
+    pieces = split_tree(parse(CODE), 2)
+    # Two groups of routines plus the code between them
+    assert len(pieces) == 3
+    routine_bytes = sum(end - start for piece in pieces[:-1] for start, end, _, _ in piece.ranges)
+    gap_bytes = sum(end - start for start, end, _, _ in pieces[-1].ranges)
+    assert routine_bytes + gap_bytes == len(CODE)
+
+
+def test_split_matches_whole_file(parse: Parser):
+    expected = run_tests_on_code(parse(CODE), test_list, "foo.f90")
+
+    piece_logs = [
+        run_tests_on_code(
+            FortranTree(CODE, included_ranges=piece.included_ranges()), test_list, "foo.f90"
+        )
+        for piece in split_tree(parse(CODE), 4)
+    ]
+    (merged,) = merge_pieces(piece_logs)
+
+    assert summary(merged) == summary(expected)
+
+
+def test_split_no_routines(parse: Parser):
+    assert split_tree(parse(b"z = 1.0"), 4) == []
@@ -0,0 +1,68 @@
+# pylint: disable=W0621,C0116,C0114
+import pathlib
+import subprocess
+import sys
+
+import pytest
+
+from castep_linter import scan_files
+
+SLOW_MODULES = [
+    "rich",
+    "junitparser",
+    "multiprocessing.pool",
+    "tarfile",
+    "zipfile",
+    "castep_linter.budget",
+    "castep_linter.journal",
+    "castep_linter.routine_cache",
+    "castep_linter.statistics",
+    "castep_linter.error_logging.baseline",
+    "castep_linter.error_logging.json_writer",
+    "castep_linter.error_logging.xml_writer",
+]
+
+
+def test_slow_modules_not_imported():
+    code = (
+        "import sys, castep_linter.scan_files;"
+        f"print(','.join(m for m in {SLOW_MODULES!r} if m in sys.modules))"
+    )
+    result = subprocess.run(  # noqa: S603
+        [sys.executable, "-c", code], capture_output=True, check=True, text=True
+    )
+    assert result.stdout.strip() == ""
+
+
+def test_quiet_scan_does_not_import_rich(tmp_path: pathlib.Path):
+    source = tmp_path / "a.f90"
+    source.write_bytes(b"program p\n  z = 1.0\nend program p\n")
+    code = (
+        "import sys\n"
+        "from castep_linter.scan_files import main\n"
+        f"sys.argv = ['castep-lint', '-q', {str(source)!r}]\n"
+        "try:\n"
+        "    main()\n"
+        "except SystemExit as exc:\n"
+        "    print(exc.code)\n"
+        f"print(','.join(m for m in {SLOW_MODULES!r} if m in sys.modules))\n"
+    )
+    result = subprocess.run(  # noqa: S603
+        [sys.executable, "-c", code], capture_output=True, check=True, text=True
+    )
+    # The scan ran and found the error, without loading any of the slow modules
+    assert result.stdout.split("\n")[:2] == ["1", ""]
+
+
+def test_worker_pool():
+    assert isinstance(scan_files.worker_pool(1), scan_files.SerialPool)
+
+
+def test_serial_pool():
+    results: list = []
+    with scan_files.worker_pool(1) as pool:
+        assert list(pool.imap_unordered(abs, [-1, 2])) == [1, 2]
+        pool.apply_async(abs, (-3,), callback=results.append, error_callback=pytest.fail)
+        pool.apply_async(abs, ("x",), callback=pytest.fail, error_callback=results.append)
+    assert results[0] == 3
+    assert isinstance(results[1], TypeError)
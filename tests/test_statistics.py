@@ -0,0 +1,55 @@
+# pylint: disable=W0621,C0116,C0114
+import json
+
+from castep_linter import statistics
+from castep_linter.error_logging import ErrorLogger
+
+
+def make_counts(messages: list[tuple[str, str]]) -> statistics.CountVector:
+    error_log = ErrorLogger("filename")
+    for level, message in messages:
+        error_log.add_msg_at(level, (0, 0), (0, 1), message)
+    return statistics.count_vector(error_log)
+
+
+def test_count_vector():
+    counts = make_counts(
+        [
+            ("Error", "Float literal without kind"),
+            ("Error", "Float literal without kind"),
+            ("Warning", "Tab character in source"),
+            ("Info", "Something new"),
+        ]
+    )
+    summary = statistics.DirectorySummary(files=1, counts=counts)
+    assert summary.by_severity() == {"Error": 2, "Warn": 1, "Info": 1}
+    assert summary.by_rule() == {
+        "LITERAL_KIND": {"Error": 2, "Warn": 0, "Info": 0},
+        "TABS": {"Error": 0, "Warn": 1, "Info": 0},
+        "UNKNOWN": {"Error": 0, "Warn": 0, "Info": 1},
+    }
+
+
+def test_rollup():
+    tabs = make_counts([("Warning", "Tab character in source")])
+    literal = make_counts([("Error", "Float literal without kind")])
+    summaries = statistics.rollup(
+        [("src/a.f90", tabs), ("src/sub/b.f90", literal), ("c.f90", statistics.empty_vector())]
+    )
+
+    assert list(summaries) == [".", "src", "src/sub"]
+    assert summaries["."].files == 3
+    assert summaries["."].by_severity() == {"Error": 1, "Warn": 1, "Info": 0}
+    assert summaries["src"].files == 2
+    assert summaries["src/sub"].by_severity() == {"Error": 1, "Warn": 0, "Info": 0}
+
+
+def test_write_statistics(tmp_path):
+    file = tmp_path / "stats.json"
+    tabs = make_counts([("Warning", "Tab character in source")])
+    statistics.write_statistics(file, statistics.rollup([("src/a.f90", tabs)]))
+
+    with open(file, encoding="utf-8") as fd:
+        report = json.load(fd)
+    assert report["src"]["files"] == 1
+    assert report["src"]["rules"] == {"TABS": {"Error": 0, "Warn": 1, "Info": 0}}
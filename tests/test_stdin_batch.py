@@ -0,0 +1,54 @@
+# pylint: disable=W0621,C0116,C0114
+import io
+import json
+
+import pytest
+
+from castep_linter.error_logging import ERROR_SEVERITY
+from castep_linter.error_logging.ndjson_writer import NdjsonWriter
+from castep_linter.linter import Linter
+from castep_linter.stdin_batch import lint_documents, read_documents
+
+SOURCE = b"x = 1.0\n"
+
+
+def encode(*documents: tuple) -> io.BytesIO:
+    stream = io.BytesIO()
+    for name, contents in documents:
+        stream.write(f"{len(contents)} {name}\n".encode() + contents)
+    stream.seek(0)
+    return stream
+
+
+def test_read_documents():
+    documents = [("dir/a b.f90", SOURCE), ("empty.f90", b""), ("c.f90", b"\n\n1 x\n")]
+    assert list(read_documents(encode(*documents))) == documents
+
+
+@pytest.mark.parametrize(
+    ("data", "match"),
+    [(b"x.f90\n", "header"), (b"3\n", "header"), (b"5 x.f90\nab", "ended 2 bytes into 5")],
+)
+def test_bad_stream(data: bytes, match: str):
+    with pytest.raises(ValueError, match=match):
+        list(read_documents(io.BytesIO(data)))
+
+
+def test_lint_documents():
+    out = io.StringIO()
+    writer = NdjsonWriter(out, ERROR_SEVERITY["Info"])
+    stream = encode(("a.f90", SOURCE), ("b.f90", b"x = 1\n"), ("c.f90", SOURCE))
+    with writer:
+        assert lint_documents(Linter(), read_documents(stream), writer) == 3
+    assert not out.closed
+
+    records = [json.loads(line) for line in out.getvalue().splitlines()]
+    assert [(r["path"], "done" in r) for r in records] == [
+        ("a.f90", False),
+        ("a.f90", True),
+        ("b.f90", True),
+        ("c.f90", False),
+        ("c.f90", True),
+    ]
+    assert records[1] == {"path": "a.f90", "done": True, "issues": 1, "truncated": False}
+    assert records[0]["message"] == "Float literal without kind"
@@ -0,0 +1,20 @@
+# pylint: disable=W0621,C0116,C0114
+import pathlib
+
+from castep_linter import storage
+
+
+def test_write_atomic(tmp_path: pathlib.Path):
+    file = tmp_path / "cache" / "index.json"
+    storage.write_atomic(file, b"first")
+    storage.write_atomic(file, b"second")
+    assert file.read_bytes() == b"second"
+    # Nothing is left behind next to it
+    assert list(file.parent.iterdir()) == [file]
+
+
+def test_digests(tmp_path: pathlib.Path):
+    file = tmp_path / "a.f90"
+    file.write_bytes(b"z = 1.0\n")
+    assert storage.file_digest(file) == storage.source_digest(b"z = 1.0\n")
+    assert storage.source_digest(b"z = 2.0\n") != storage.source_digest(b"z = 1.0\n")
@@ -0,0 +1,104 @@
+# pylint: disable=W0621,C0116,C0114
+from unittest import mock
+
+from castep_linter.error_logging import ErrorLogger
+from castep_linter.routine_cache import RoutineCache, ruleset_fingerprint, run_tests_cached
+from castep_linter.scan_files import run_lexical_tests, run_tests_on_code
+from castep_linter.suppressions import SuppressionIndex
+from castep_linter.tests import check_tabs, test_list
+from tests.conftest import Parser
+
+CODE = b"""module foo
+contains
+subroutine a()
+  z = 1.0  ! castep-lint: disable=LITERAL_KIND
+  z = 2.0
+  ! castep-lint: disable-next-line=literal_kind
+  z = 3.0
+  ! castep-lint: disable=LITERAL_KIND, TRACE
+  z = 4.0
+  ! castep-lint: enable=LITERAL_KIND
+  z = 5.0
+end subroutine a
+end module foo
+"""
+
+
+def lint(parse: Parser, code: bytes, **kwargs) -> ErrorLogger:
+    return run_tests_on_code(
+        parse(code), test_list, "foo.f90", suppressions=SuppressionIndex.from_source(code), **kwargs
+    )
+
+
+def test_no_suppressions():
+    assert not SuppressionIndex.from_source(b"z = 1.0 ! just a comment\n")
+
+
+def test_scopes():
+    index = SuppressionIndex.from_source(CODE)
+    assert [index.is_suppressed("LITERAL_KIND", line) for line in range(3, 11)] == [
+        True,  # same line
+        False,
+        False,
+        True,  # next line
+        True,
+        True,  # block
+        True,
+        False,
+    ]
+    assert index.is_suppressed("TRACE", 11)
+    assert not index.is_suppressed("KIND", 8)
+
+
+def test_covers():
+    index = SuppressionIndex.from_source(
+        b"! castep-lint: disable=ALL\nz\n! castep-lint: enable=ALL\n"
+    )
+    assert index.covers("KIND", 0, 2)
+    assert not index.covers("KIND", 0, 3)
+
+
+def test_all_merged_with_rule():
+    index = SuppressionIndex.from_source(
+        b"! castep-lint: disable=KIND\nz\n! castep-lint: disable=ALL\nz\n"
+    )
+    assert index.covers("KIND", 0, 100)
+    assert not index.covers("TABS", 0, 100)
+    assert index.covers("TABS", 2, 100)
+
+
+def test_diagnostics_filtered(parse: Parser):
+    error_log = lint(parse, CODE)
+    literal_errors = [e for e in error_log if "literal" in e.message]
+    assert [e.start_point[0] for e in literal_errors] == [4, 10]
+
+
+def test_suppressed_rule_not_run(parse: Parser):
+    code = b"! castep-lint: disable=TRACE\nsubroutine x()\nend subroutine x\n"
+    with mock.patch("castep_linter.tests.dispatch.node_factory.wrap_node") as wrap_node:
+        error_log = lint(parse, code)
+    wrap_node.assert_not_called()
+    assert len(error_log) == 0
+
+
+def test_lexical_suppressed():
+    code = b"\tz = 1 ! castep-lint: disable=TABS\n\tz = 2\n"
+    error_log = ErrorLogger("foo.f90", suppressions=SuppressionIndex.from_source(code))
+    run_lexical_tests(code, [check_tabs], error_log)
+    assert [e.start_point for e in error_log] == [(1, 0)]
+
+
+def test_cache_sees_outer_suppression(parse: Parser, tmp_path):
+    routine = b"subroutine x()\nz = 1.0\nend subroutine x\n"
+    tests = {"number_literal": test_list["number_literal"]}
+
+    def cached(code):
+        cache = RoutineCache(tmp_path, "foo.f90", ruleset_fingerprint(tests))
+        error_log = run_tests_cached(
+            parse(code), tests, "foo.f90", cache, suppressions=SuppressionIndex.from_source(code)
+        )
+        cache.save()
+        return error_log
+
+    assert len(cached(b"! castep-lint: disable=LITERAL_KIND\n" + routine)) == 0
+    assert len(cached(b"! castep-lint: disable=KIND\n" + routine)) == 1
@@ -0,0 +1,214 @@
+# pylint: disable=W0621,C0116,C0114
+import pathlib
+from unittest import mock
+
+import pytest
+
+from castep_linter import scan_files, symbol_index
+from castep_linter.fortran.parser import FortranTree
+from castep_linter.symbol_index import FileFacts, SymbolIndex, extract_facts
+
+CONSTANTS = b"""module constants
+  use iso_fortran_env, only: real32
+  implicit none
+  integer, parameter :: dp = selected_real_kind(15, 300)
+  integer, parameter, public :: sp = real32, nmax = 10
+contains
+  subroutine traced(x)
+    use trace, only: trace_entry, trace_exit
+    real(kind=dp) :: x
+    call trace_entry("traced")
+    call trace_exit("traced")
+  end subroutine traced
+  real(kind=dp) function untraced()
+  end function untraced
+end module constants
+"""
+
+MAIN = b"""program main
+  use constants
+  integer, parameter :: local = kind(1)
+  call traced(1.0_dp)
+end program main
+"""
+
+
+@pytest.fixture
+def project(tmp_path: pathlib.Path) -> list:
+    (tmp_path / "constants.f90").write_bytes(CONSTANTS)
+    (tmp_path / "main.f90").write_bytes(MAIN)
+    return [tmp_path / "constants.f90", tmp_path / "main.f90"]
+
+
+def test_extract_facts():
+    facts = extract_facts(FortranTree(CONSTANTS))
+    assert facts == FileFacts(
+        modules=["constants"],
+        uses=["iso_fortran_env", "trace"],
+        routines={"traced": True, "untraced": False},
+        kind_parameters={"dp": "constants", "sp": "constants"},
+    )
+    # Parameters outside modules cannot be used from other files
+    assert extract_facts(FortranTree(MAIN)).kind_parameters == {}
+
+    # Only statements which define or use a module, and calls directly in the routine
+    source = b"""submodule (parent) child
+  Use, Intrinsic :: ISO_C_BINDING
+  ! module commented
+contains
+  module procedure foo
+    x = 1 ! use commented
+  end procedure foo
+end submodule child
+MODULE Upper ! comment
+contains
+  subroutine conditional
+    if (.true.) call trace_entry("conditional")
+  end subroutine conditional
+end module upper
+"""
+    assert extract_facts(FortranTree(source)) == FileFacts(
+        modules=["parent:child", "upper"],
+        uses=["parent", "iso_c_binding"],
+        routines={"conditional": False},
+    )
+
+
+def test_use_continued():
+    source = b"module m\n  use &\n    ! comment\n    constants, only: dp\nend module m\n"
+    assert extract_facts(FortranTree(source)).uses == ["constants"]
+
+
+def test_use_after_semicolon():
+    source = b"program p\n  use a; use b\n  use a\nend program p\n"
+    assert extract_facts(FortranTree(source)).uses == ["a", "b"]
+
+
+def test_submodule_uses_parent():
+    facts = extract_facts(FortranTree(b"submodule (constants) impl\nend submodule impl\n"))
+    assert facts.modules == ["constants:impl"]
+    assert facts.uses == ["constants"]
+
+    facts = extract_facts(FortranTree(b"submodule (Constants:impl) deeper\nend submodule\n"))
+    assert facts.modules == ["constants:deeper"]
+    assert facts.uses == ["constants", "constants:impl"]
+
+
+def test_lookups(project):
+    index = SymbolIndex()
+    assert index.update(project) == 2
+
+    assert index.module_files("Constants") == [str(project[0])]
+    assert index.module_users("constants") == [str(project[1])]
+    assert index.module_users("unknown") == []
+    assert index.routine_files("TRACED") == [str(project[0])]
+    assert index.is_traced("traced")
+    assert index.is_traced("untraced") is False
+    assert index.is_traced("unknown") is None
+    assert index.kind_parameter_module("DP") == "constants"
+    assert index.kind_parameter_module("nmax") is None
+
+
+def test_incremental(project, tmp_path: pathlib.Path):
+    index_file = tmp_path / "index" / "symbols.json"
+    index = SymbolIndex()
+    index.update(project)
+    index.save(index_file)
+
+    index = SymbolIndex.load(index_file)
+    assert index.update(project) == 0
+    assert index.module_files("constants") == [str(project[0])]
+    assert index.kind_parameter_module("dp") == "constants"
+
+    project[1].write_bytes(MAIN.replace(b"program main", b"module main"))
+    project[0].unlink()
+    assert index.update(project[1:]) == 1
+    assert list(index.entries) == [str(project[1])]
+    assert index.module_files("constants") == []
+    assert index.module_files("main") == [str(project[1])]
+    assert index.kind_parameter_module("dp") is None
+
+
+def test_bad_index(tmp_path: pathlib.Path):
+    index_file = tmp_path / "symbols.json"
+    index_file.write_text('{"version": 0, "files": {}}')
+    assert not SymbolIndex.load(index_file).entries
+    index_file.write_text("{")
+    assert not SymbolIndex.load(index_file).entries
+
+
+def test_active_index(project, tmp_path: pathlib.Path):
+    index_file = tmp_path / "symbols.json"
+    index = SymbolIndex()
+    index.update(project[1:])
+    index.save(index_file)
+
+    symbol_index.activate(index_file)
+    active = symbol_index.active_index()
+    assert active is not None
+    assert active.module_users("constants")
+    assert active.kind_parameter_module("dp") is None
+
+    # Saving the index again is picked up by the next scan
+    index.update(project)
+    index.save(index_file)
+    active = symbol_index.active_index()
+    assert active is not None
+    assert active.kind_parameter_module("dp") == "constants"
+
+    symbol_index.activate(None)
+    assert symbol_index.active_index() is None
+
+
+def test_affected(project, tmp_path: pathlib.Path):
+    physics = tmp_path / "physics.f90"
+    physics.write_bytes(b"module physics\n  use constants\nend module physics\n")
+    project[1].write_bytes(MAIN.replace(b"use constants", b"use physics"))
+    unrelated = tmp_path / "unrelated.f90"
+    unrelated.write_bytes(b"module unrelated\nend module unrelated\n")
+    files = [*project, physics, unrelated]
+    index = SymbolIndex()
+    index.update(files)
+
+    # main only uses constants through physics
+    assert index.affected([project[0]]) == {str(file) for file in [*project, physics]}
+    assert index.affected([project[1]]) == {str(project[1])}
+    assert index.affected([unrelated]) == {str(unrelated)}
+
+    # Submodules depend on their ancestor, and on their parent submodule
+    impl = tmp_path / "impl.f90"
+    impl.write_bytes(b"submodule (constants) impl\nend submodule impl\n")
+    deeper = tmp_path / "deeper.f90"
+    deeper.write_bytes(b"submodule (constants:impl) deeper\nend submodule deeper\n")
+    index.update([*files, impl, deeper])
+    assert {str(impl), str(deeper)} <= index.affected([project[0]])
+    assert index.affected([impl]) == {str(impl), str(deeper)}
+    impl.unlink()
+    deeper.unlink()
+
+    # Users of a module deleted from a file are still affected
+    old_modules = index.modules_defined([project[0]])
+    project[0].write_bytes(b"")
+    index.update(files)
+    assert index.affected([project[0]]) == {str(project[0])}
+    assert index.affected([project[0]], old_modules) == index.affected([project[0], physics])
+
+
+@pytest.mark.usefixtures("project")
+def test_changed_option(tmp_path: pathlib.Path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    argv = ["castep-lint", "--index", "symbols.json", "--changed", "main.f90", "main.f90"]
+    with mock.patch("sys.argv", argv):
+        args = scan_files.parse_args()
+    files = [pathlib.Path("constants.f90"), pathlib.Path("main.f90")]
+    assert scan_files.update_index(args, files) == files[1:]
+    assert (tmp_path / "symbols.json").exists()
+
+    args.changed = [pathlib.Path("constants.f90")]
+    assert scan_files.update_index(args, files) == files
+
+    args.changed = None
+    assert scan_files.update_index(args, files) == files
+
+    with mock.patch("sys.argv", argv[:1] + argv[3:]), pytest.raises(SystemExit):
+        scan_files.parse_args()
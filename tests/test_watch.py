@@ -0,0 +1,73 @@
+# pylint: disable=W0621,C0116,C0114
+import os
+import pathlib
+import threading
+
+import pytest
+
+from castep_linter.linter import Linter
+from castep_linter.watch import Watcher, compare_snapshots, snapshot
+
+ONE_ISSUE = b"x = 1.0\n"
+TWO_ISSUES = b"x = 1.0\ny = 2.0\n"
+
+
+def touch(file: pathlib.Path, contents: bytes) -> None:
+    file.write_bytes(contents)
+    # Make sure the change is visible even on filesystems with coarse timestamps
+    stat = file.stat()
+    os.utime(file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+
+@pytest.fixture
+def tree(tmp_path: pathlib.Path) -> pathlib.Path:
+    (tmp_path / "sub").mkdir()
+    (tmp_path / "a.f90").write_bytes(ONE_ISSUE)
+    (tmp_path / "sub" / "b.F90").write_bytes(b"x = 1\n")
+    (tmp_path / "notes.txt").write_bytes(ONE_ISSUE)
+    return tmp_path
+
+
+def test_snapshot(tree: pathlib.Path):
+    old = snapshot(tree)
+    assert sorted(old) == [tree / "a.f90", tree / "sub" / "b.F90"]
+
+    touch(tree / "a.f90", TWO_ISSUES)
+    (tree / "sub" / "b.F90").unlink()
+    (tree / "c.f90").write_bytes(b"")
+    assert compare_snapshots(old, snapshot(tree)) == (
+        [tree / "a.f90", tree / "c.f90"],
+        [tree / "sub" / "b.F90"],
+    )
+
+
+def test_deltas(tree: pathlib.Path):
+    watcher = Watcher(Linter(), tree)
+    deltas = watcher.start()
+    assert [(d.filename, len(d.introduced), len(d.fixed)) for d in deltas] == [
+        (str(tree / "a.f90"), 1, 0)
+    ]
+
+    touch(tree / "a.f90", TWO_ISSUES)
+    (delta,) = watcher.relint([tree / "a.f90"], [])
+    assert [err.start_point for err in delta.introduced] == [(1, 4)]
+    assert not delta.fixed
+
+    # Moving an issue to another line is not a change
+    touch(tree / "a.f90", b"\n" + TWO_ISSUES)
+    assert watcher.relint([tree / "a.f90"], []) == []
+
+    (tree / "a.f90").unlink()
+    (delta,) = watcher.relint([tree / "a.f90"], [])
+    assert len(delta.fixed) == 2
+    assert not watcher.issues
+
+
+def test_wait_for_changes(tree: pathlib.Path):
+    watcher = Watcher(Linter(), tree, interval=0.01, settle=0.05)
+    watcher.start()
+
+    timer = threading.Timer(0.05, touch, (tree / "a.f90", TWO_ISSUES))
+    timer.start()
+    assert watcher.wait_for_changes() == ([tree / "a.f90"], [])
+    timer.join()